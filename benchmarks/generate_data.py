@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Write a reproducible set of synthetic ESO files for the benchmarks.
+
+The same seed and scale always produce byte-identical files, so timings taken on different
+commits are measured on the same input. Section sizes follow section_constants.section_info
+(numStrings times --scale, string lengths capped by maxStringLength), and the English,
+previous English and Korean variants differ the way real patches do: a few strings edited,
+added and removed, and most but not all strings translated.
+
+Files written to the output folder:
+    en_cur.lang, en_prv.lang, ko.lang             binary language files
+    en_cur_tagged.txt, en_prv_tagged.txt,         {{sectionId-sectionIndex-stringIndex:}}text
+    ko_tagged.txt
+    en_client.str, en_prv_client.str,             [SI_KEY] = "text" client strings
+    en_pregame.str, ko_client.str
+    ko_tagged.xliff                               Crowdin XLIFF 1.2 export of ko_tagged.txt
+    en_itemnames.dat, en_itemids.dat              itemnames/itemids pair
+    LibQuestHelper.lua                            SavedVariables table for build_lqd_mapindex_files
+
+Usage:
+    python benchmarks/generate_data.py OUTPUT_FOLDER [--seed N] [--scale F]
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import section_constants
+from lua_decode import generate_saved_variables
+
+DEFAULT_SEED = 1
+DEFAULT_SCALE = 0.02
+
+ENGLISH_WORDS = [
+    "the", "of", "and", "to", "a", "in", "you", "Dragon", "Guild", "Tamriel", "Daedric", "shrine",
+    "Vivec", "Nord", "Imperial", "gold", "quest", "sword", "armor", "return", "find", "speak",
+    "with", "defeat", "collect", "Ebonheart", "Pact", "Aldmeri", "Dominion", "ancient", "ruins",
+]
+KOREAN_WORDS = [
+    "드래곤", "길드", "탐리엘", "데이드릭", "제단", "금화", "퀘스트", "검", "갑옷", "돌아가기",
+    "찾기", "대화하기", "처치", "수집", "에본하트", "고대", "유적", "의", "을", "를", "에게",
+]
+DECORATIONS = ["<<1>>", "<<C:1>>", "<<2[%d Skill Point/%d Skill Points]>>", "|cFFFFFF<<1>>|r", "^M", "^F"]
+
+
+def make_text(rnd, words, max_length):
+    """Returns a sentence of up to max_length characters with an occasional ESO placeholder or color tag."""
+    target = rnd.randint(1, max(1, min(max_length, 400)))
+    parts = []
+    length = 0
+    while length < target:
+        part = rnd.choice(DECORATIONS) if rnd.random() < 0.04 else rnd.choice(words)
+        parts.append(part)
+        length += len(part) + 1
+    text = " ".join(parts)[:max(1, max_length)]
+    if rnd.random() < 0.1:
+        text = text[0].upper() + text[1:] + "."
+    return text.strip() or rnd.choice(words)
+
+
+def generate_lang_entries(rnd, scale):
+    """Returns [(sectionId, sectionIndex, stringIndex, text)] with sizes taken from section_constants."""
+    entries = []
+    for section_id, info in section_constants.section_info.items():
+        count = max(1, int(round(info.get("numStrings", 1) * scale)))
+        max_length = info.get("maxStringLength") or 80
+        string_index = rnd.randint(1, 1000)
+        # Short repeated strings are common in the game files and deduplicated by writeLangFile
+        common = [make_text(rnd, ENGLISH_WORDS, min(max_length, 20)) for _ in range(3)]
+        for _ in range(count):
+            text = rnd.choice(common) if rnd.random() < 0.15 else make_text(rnd, ENGLISH_WORDS, max_length)
+            entries.append((section_id, 0, string_index, text))
+            string_index += rnd.randint(1, 3)
+    return entries
+
+
+def make_previous_entries(rnd, entries):
+    """Returns the entries of the previous patch: about 3% edited, 1% not there yet, 1% removed since."""
+    previous = []
+    for section_id, section_index, string_index, text in entries:
+        roll = rnd.random()
+        if roll < 0.01:
+            continue  # Added in the current patch
+        if roll < 0.04:
+            words = text.split(" ")
+            words[rnd.randrange(len(words))] = rnd.choice(ENGLISH_WORDS)
+            text = " ".join(words)
+        previous.append((section_id, section_index, string_index, text))
+    for section_id, section_index, string_index, text in rnd.sample(entries, max(1, len(entries) // 100)):
+        previous.append((section_id, section_index + 1, string_index, text))  # Removed in the current patch
+    return previous
+
+
+def make_translated_entries(rnd, entries):
+    """Returns Korean entries; about 8% keep the English text like untranslated strings do."""
+    translated = []
+    for section_id, section_index, string_index, text in entries:
+        if rnd.random() >= 0.08:
+            text = make_text(rnd, KOREAN_WORDS, max(4, len(text) // 2))
+        translated.append((section_id, section_index, string_index, text))
+    return translated
+
+
+def write_lang_file(path, entries):
+    strings = {}
+    string_data = bytearray()
+    index_data = bytearray()
+    for section_id, section_index, string_index, text in entries:
+        encoded = text.encode("utf-8")
+        if encoded not in strings:
+            strings[encoded] = len(string_data)
+            string_data += encoded + b"\x00"
+        index_data += struct.pack(">IIII", section_id, section_index, string_index, strings[encoded])
+    with open(path, "wb") as f:
+        # The first header field is 2 in the game files (readLangFile calls it numSections)
+        f.write(struct.pack(">II", 2, len(entries)))
+        f.write(index_data)
+        f.write(string_data)
+
+
+def write_tagged_file(path, entries):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for section_id, section_index, string_index, text in entries:
+            f.write(f"{{{{{section_id}-{section_index}-{string_index}:}}}}{text}\n")
+
+
+def generate_client_entries(rnd, count):
+    """Returns [(key, text)] like en_client.str; about 2% of the strings are empty."""
+    entries = []
+    for number in range(count):
+        key = f"SI_{rnd.choice(ENGLISH_WORDS).upper()}_{rnd.choice(ENGLISH_WORDS).upper()}_{number}"
+        text = "" if rnd.random() < 0.02 else make_text(rnd, ENGLISH_WORDS, 120).replace('"', '\\"')
+        entries.append((key, text))
+    return entries
+
+
+def write_client_file(path, entries, fonts=True):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        if fonts:
+            f.write('[Font:ZoFontAlert] = "EsoUI/Common/Fonts/univers57.slug|24|soft-shadow-thick"\n')
+            f.write('[Font:ZoFontGame] = "EsoUI/Common/Fonts/univers57.slug|18|soft-shadow-thin"\n')
+        for key, text in entries:
+            f.write(f'[{key}] = "{text}"\n')
+
+
+def write_xliff_file(path, english_entries, translated_entries, rnd):
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<xliff xmlns="urn:oasis:names:tc:xliff:document:1.2" version="1.2">\n')
+        f.write('  <file original="en_cur_tagged.txt" source-language="en" target-language="ko" datatype="plaintext">\n')
+        f.write("    <body>\n")
+        for unit_id, (english, translated) in enumerate(zip(english_entries, translated_entries), start=1):
+            key = f"{english[0]}-{english[1]}-{english[2]}"
+            state = "translated" if rnd.random() < 0.9 else "needs-translation"
+            f.write(f'      <trans-unit id="{unit_id}" resname="{key}">\n')
+            f.write(f"        <source>{escape(english[3])}</source>\n")
+            f.write(f'        <target state="{state}">{escape(translated[3])}</target>\n')
+            f.write(f'        <context-group purpose="information"><context context-type="source">{key}</context></context-group>\n')
+            f.write("      </trans-unit>\n")
+        f.write("    </body>\n  </file>\n</xliff>\n")
+
+
+def write_itemnames_files(prefix, rnd, count):
+    """Writes <prefix>_itemids.dat and <prefix>_itemnames.dat with count names shared by 1 to 3 item ids each."""
+    item_ids = bytearray(struct.pack(">I", 1))
+    positions = []
+    for number in range(count * 2):
+        positions.append(len(item_ids))
+        record_type = rnd.choice([1, 3, 7])
+        item_ids += bytes([record_type]) + struct.pack(">I", 10000 + number)
+        if record_type == 3:
+            item_ids += struct.pack(">H", rnd.randrange(65536))
+        elif record_type == 7:
+            item_ids += struct.pack(">HH", rnd.randrange(65536), rnd.randrange(65536))
+
+    item_names = bytearray(struct.pack(">I", 2))
+    offset = 4
+    position_index = 0
+    while position_index < len(positions):
+        shared = rnd.randint(1, 3)
+        name = " ".join(rnd.choice(ENGLISH_WORDS).capitalize() for _ in range(rnd.randint(1, 4))).encode("utf-8")
+        item_names += name + b"\x00" + struct.pack(">IBI", positions[position_index], shared, offset)
+        offset += len(name) + 1
+        position_index += shared
+
+    with open(f"{prefix}_itemids.dat", "wb") as f:
+        f.write(item_ids)
+    with open(f"{prefix}_itemnames.dat", "wb") as f:
+        f.write(item_names)
+
+
+def generate_all(output_folder, seed=DEFAULT_SEED, scale=DEFAULT_SCALE):
+    """Writes every benchmark input file to output_folder and returns their names."""
+    os.makedirs(output_folder, exist_ok=True)
+    rnd = random.Random(seed)
+
+    def path(name):
+        return os.path.join(output_folder, name)
+
+    current = generate_lang_entries(rnd, scale)
+    previous = make_previous_entries(rnd, current)
+    translated = make_translated_entries(rnd, current)
+    write_lang_file(path("en_cur.lang"), current)
+    write_lang_file(path("en_prv.lang"), previous)
+    write_lang_file(path("ko.lang"), translated)
+    write_tagged_file(path("en_cur_tagged.txt"), current)
+    write_tagged_file(path("en_prv_tagged.txt"), previous)
+    write_tagged_file(path("ko_tagged.txt"), translated)
+    write_xliff_file(path("ko_tagged.xliff"), current, translated, rnd)
+
+    # en_client.str has about 23000 strings in the live game
+    client = generate_client_entries(rnd, max(10, int(23000 * scale * 10)))
+    pregame = generate_client_entries(rnd, max(10, int(3000 * scale * 10)))
+    previous_client = [(key, text) for key, text in client if rnd.random() > 0.01]
+    translated_client = [(key, make_text(rnd, KOREAN_WORDS, 60) if rnd.random() >= 0.05 else text) for key, text in client]
+    write_client_file(path("en_client.str"), client)
+    write_client_file(path("en_prv_client.str"), previous_client)
+    write_client_file(path("en_pregame.str"), pregame)
+    write_client_file(path("ko_client.str"), translated_client)
+
+    # en_itemnames.dat has about 90000 names in the live game
+    write_itemnames_files(path("en"), rnd, max(10, int(90000 * scale)))
+
+    map_count = max(2, int(40 * scale * 10))
+    with open(path("LibQuestHelper.lua"), "w", encoding="utf-8", newline="\n") as f:
+        f.write(generate_saved_variables(map_count=map_count, seed=seed))
+
+    return sorted(os.listdir(output_folder))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic ESO files for the benchmarks.")
+    parser.add_argument("output_folder", help="Folder to write the files to.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed (default: %(default)s).")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE,
+                        help="Fraction of the live game's string counts (default: %(default)s).")
+    args = parser.parse_args()
+
+    for name in generate_all(args.output_folder, args.seed, args.scale):
+        size = os.path.getsize(os.path.join(args.output_folder, name))
+        print(f"{name:<24}{size:>12,} bytes")
+
+
+if __name__ == "__main__":
+    main()
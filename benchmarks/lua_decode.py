@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Compare esolua.decode with slpp.decode on a SavedVariables file.
+
+Usage:
+    python benchmarks/lua_decode.py [path/to/LibQuestHelper.lua] [--repeat N]
+
+Without a path a LibQuestHelper-style table is generated. slpp is optional; when it is
+installed both parsers are timed and their results must match.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import esolua
+
+
+def generate_saved_variables(map_count=40, map_ids=30, quests=40, seed=1):
+    rnd = random.Random(seed)
+    lines = ["LibQuestHelper_SavedVariables =", "{", '    ["location_data_by_mapIndex"] = ', "    {"]
+    for map_number in range(map_count):
+        lines.append(f'        ["map{map_number:03d}"] = ')
+        lines.append("        {")
+        for map_id in rnd.sample(range(1, 3000), map_ids):
+            lines.append(f"            [{map_id}] = ")
+            lines.append("            {")
+            for index in range(1, quests + 1):
+                x, y = rnd.random(), rnd.random()
+                lines.append(f'                [{index}] = "{rnd.randint(1, 7000)}:{x:.4f}:{y:.4f}:1",')
+            lines.append("            },")
+        lines.append("        },")
+    lines += ["    },", '    ["version"] = 3,', "}", ""]
+    return "\n".join(lines)
+
+
+def time_decode(decode, text, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = decode(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark esolua.decode against slpp.decode.")
+    parser.add_argument("path", nargs="?", help="Lua file to decode (default: generated LibQuestHelper table).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per parser; the best time is reported.")
+    args = parser.parse_args()
+
+    if args.path:
+        with open(args.path, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = generate_saved_variables()
+    # Same preparation as build_lqd_mapindex_files
+    text = re.sub(r'^\s*\w+\s*=\s*', '', text, count=1)
+
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    print(f"Input: {args.path or 'generated'} ({size_mb:.2f} MB)")
+
+    esolua_time, esolua_result = time_decode(esolua.decode, text, args.repeat)
+    print(f"esolua: {esolua_time:.3f}s ({size_mb / esolua_time:.1f} MB/s)")
+
+    try:
+        from slpp import slpp
+    except ImportError:
+        print("slpp is not installed; skipping comparison.")
+        return
+
+    slpp_time, slpp_result = time_decode(slpp.decode, text, args.repeat)
+    print(f"slpp:   {slpp_time:.3f}s ({size_mb / slpp_time:.1f} MB/s)")
+    print(f"Speedup: {slpp_time / esolua_time:.1f}x")
+
+    if esolua_result != slpp_result:
+        print("Error: esolua and slpp results differ.")
+        sys.exit(1)
+    print("Results match.")
+
+
+if __name__ == "__main__":
+    main()
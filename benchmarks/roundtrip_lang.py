@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Check that .lang files survive the tagged text round trip byte for byte, and time each stage.
+
+For every file the chain is:
+
+    .lang --readLangFile--> dicts --writeLangFile--> canonical .lang
+    .lang --create_tagged_lang_text--> tagged text --read_tagged_text_to_dict--> dicts --writeLangFile--> .lang
+
+The .lang rebuilt from tagged text must equal the canonical .lang, and for files that are
+already deduplicated in first-use order (the game files and generate_data.py output) both
+must equal the input. The first differing entry is printed on a mismatch and the exit code
+is 1, so the script can gate a change to any of these functions. Each stage reports MB/s of
+the file it reads or writes, best of --repeat runs.
+
+Without arguments a generated .lang (generate_data.py) and a small file of edge cases are
+checked: non-breaking spaces, newlines, quotes, backslashes, placeholders and repeated
+strings. Known limits of the tagged format, which real files do not hit: empty strings and
+trailing whitespace are dropped, and text containing the literal -=CR=- / -=NB=- markers
+does not come back unchanged.
+
+Usage:
+    python benchmarks/roundtrip_lang.py [file.lang ...] [--repeat N] [--scale F] [--seed N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import esolang
+from generate_data import DEFAULT_SCALE, DEFAULT_SEED, generate_lang_entries, write_lang_file
+
+EDGE_CASE_TEXTS = [
+    "plain text",
+    "non\xa0breaking\xa0space",
+    "line one\nline two\n\nline four",
+    'she said "hello"',
+    "back\\slash and \\\\ double",
+    "<<1>> found <<C:2>> in <<3[nothing/one item/$d items]>>",
+    "|cFFD700gold|r and |t32:32:EsoUI/Art/icon.dds|t",
+    "검은 용 \xa0 épée Ключ 日本語",
+    "plain text",  # repeated string shares one offset
+    "tab\tseparated",
+]
+
+
+def write_edge_case_lang(path):
+    entries = [(3952276, 0, number, text) for number, text in enumerate(EDGE_CASE_TEXTS, start=1)]
+    write_lang_file(path, entries)
+
+
+def best_time(repeat, func, *args):
+    """Runs func repeat times with its messages hidden; returns (result of the last run, fastest seconds)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def describe_first_difference(expected_path, actual_path):
+    """Returns a line naming the first entry that differs between two .lang files."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected, _ = esolang.readLangFile(expected_path)
+        actual, _ = esolang.readLangFile(actual_path)
+    if expected["numIndexes"] != actual["numIndexes"]:
+        return f"entry count {expected['numIndexes']} != {actual['numIndexes']}"
+    if expected["numSections"] != actual["numSections"]:
+        return f"header numSections {expected['numSections']} != {actual['numSections']}"
+    for index in range(expected["numIndexes"]):
+        want, got = expected[index], actual[index]
+        if want != got:
+            key = f"{want['sectionId']}-{want['sectionIndex']}-{want['stringIndex']}"
+            return f"entry {index} ({key}): expected {want['string']!r} offset {want['stringOffset']}, " \
+                   f"got {got['string']!r} offset {got['stringOffset']}"
+    return "entries match, string table differs"
+
+
+def same_bytes(first_path, second_path):
+    with open(first_path, "rb") as first, open(second_path, "rb") as second:
+        return first.read() == second.read()
+
+
+def check_file(lang_path, repeat):
+    """Runs the round trip for one .lang file in a temporary folder; returns True when it is byte-identical."""
+    name = os.path.basename(lang_path)
+    # The commands name their output after a language prefix, so keep one
+    work_name = name if esolang.reFilenamePrefix.match(name) else "en_" + name
+    work_folder = tempfile.mkdtemp(prefix="esolang_roundtrip_")
+    previous_folder = os.getcwd()
+    try:
+        shutil.copy2(lang_path, os.path.join(work_folder, work_name))
+        os.chdir(work_folder)
+        stem = os.path.splitext(work_name)[0]
+        lang_mb = os.path.getsize(work_name) / (1024 * 1024)
+
+        (file_indexes, file_strings), read_seconds = best_time(repeat, esolang.readLangFile, work_name)
+        canonical = f"{stem}_roundtrip_canonical.lang"
+        _, write_seconds = best_time(repeat, esolang.writeLangFile, canonical, file_indexes, file_strings)
+
+        _, tagged_seconds = best_time(repeat, esolang.create_tagged_lang_text, work_name)
+        tagged, _ = esolang.generate_output_filename(work_name, "tagged_lang_text")
+        tagged_mb = os.path.getsize(tagged) / (1024 * 1024)
+        (tagged_indexes, tagged_strings), parse_seconds = best_time(repeat, esolang.read_tagged_text_to_dict, tagged)
+        rebuilt = f"{stem}_roundtrip_rebuilt.lang"
+        _, rebuild_seconds = best_time(repeat, esolang.writeLangFile, rebuilt, tagged_indexes, tagged_strings)
+        rebuilt_mb = os.path.getsize(rebuilt) / (1024 * 1024)
+
+        print(f"\n{name}: {file_indexes['numIndexes']} entries, {file_strings['stringCount']} strings, {lang_mb:.2f} MB")
+        stages = [
+            ("readLangFile", lang_mb, read_seconds),
+            ("writeLangFile", os.path.getsize(canonical) / (1024 * 1024), write_seconds),
+            ("create_tagged_lang_text", lang_mb, tagged_seconds),
+            ("read_tagged_text_to_dict", tagged_mb, parse_seconds),
+            ("writeLangFile (from tagged)", rebuilt_mb, rebuild_seconds),
+        ]
+        for stage, size_mb, seconds in stages:
+            print(f"    {stage:<30}{seconds:>9.3f} s{size_mb / seconds if seconds else float('inf'):>10.1f} MB/s")
+
+        ok = True
+        checks = [
+            ("canonical .lang == input", work_name, canonical),
+            (".lang from tagged text == canonical .lang", canonical, rebuilt),
+        ]
+        for label, expected, actual in checks:
+            if same_bytes(expected, actual):
+                print(f"    OK        {label}")
+            else:
+                ok = False
+                print(f"    MISMATCH  {label}: {describe_first_difference(expected, actual)}")
+        return ok
+    finally:
+        os.chdir(previous_folder)
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the .lang -> tagged text -> .lang round trip and time each stage.")
+    parser.add_argument("files", nargs="*", help=".lang files to check; generated files when omitted.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is reported (default: %(default)s).")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE, help="Size of the generated file (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the generated file (default: %(default)s).")
+    args = parser.parse_args()
+
+    generated_folder = None
+    files = [os.path.abspath(path) for path in args.files]
+    if not files:
+        generated_folder = tempfile.mkdtemp(prefix="esolang_roundtrip_data_")
+        generated = os.path.join(generated_folder, "en_generated.lang")
+        write_lang_file(generated, generate_lang_entries(random.Random(args.seed), args.scale))
+        edge_cases = os.path.join(generated_folder, "en_edge_cases.lang")
+        write_edge_case_lang(edge_cases)
+        files = [generated, edge_cases]
+
+    try:
+        results = [check_file(path, args.repeat) for path in files]
+    finally:
+        if generated_folder:
+            shutil.rmtree(generated_folder, ignore_errors=True)
+
+    failed = results.count(False)
+    print(f"\n{len(results) - failed} of {len(results)} files round-trip byte for byte.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Time the main commands on the synthetic data from generate_data.py.
+
+Every run copies the generated files to a fresh folder and runs `python <script>.py <command>`
+there, so caches and outputs of earlier runs never help a later one. The median and the
+fastest run of each command are printed and written to a JSON file together with the commit
+hash, so results taken on different commits or machines can be compared with --compare.
+
+With --revision REV the scripts are taken from that git revision instead of the working
+tree; commands the revision does not have are reported as skipped.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--runs N] [--scale F] [--seed N] [--only TEXT]
+                                        [--revision REV] [--output FILE] [--compare FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_data import DEFAULT_SCALE, DEFAULT_SEED, generate_all
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FOLDER = os.path.join(REPO_ROOT, "benchmarks", "results")
+SCRIPT_FILES = ["esolang.py", "esotools.py", "esoutils.py", "esoKRFontPatcher.py"]
+SUPPORT_MODULES = ["esolua.py", "esoprofile.py", "esoprogress.py", "esosort.py", "section_constants.py"]
+
+# (name, script, command and arguments, untimed setup commands run first in the same folder)
+BENCHMARKS = [
+    ("create_tagged_lang_text", "esolang.py", ["create_tagged_lang_text", "en_cur.lang"], []),
+    ("extract_all_sections", "esolang.py", ["extract_all_sections", "en_cur.lang"], []),
+    ("rebuild_lang_file_from_tagged_text", "esolang.py", ["rebuild_lang_file_from_tagged_text", "en_cur_tagged.txt"], []),
+    ("diff_tagged_lang_files", "esolang.py", ["diff_tagged_lang_files", "en_cur_tagged.txt", "en_prv_tagged.txt"], []),
+    ("compare_tagged_lang_files_for_translation", "esolang.py",
+     ["compare_tagged_lang_files_for_translation", "ko_tagged.txt", "en_prv_tagged.txt", "en_cur_tagged.txt"], []),
+    ("create_po_from_tagged_lang_text", "esolang.py", ["create_po_from_tagged_lang_text", "ko_tagged.txt", "en_cur_tagged.txt"], []),
+    ("combine_client_files", "esolang.py", ["combine_client_files", "en_client.str", "en_pregame.str"], []),
+    ("create_po_from_esoui", "esolang.py", ["create_po_from_esoui", "ko_client.str", "en_client.str"], []),
+    ("compare_esoui_files_for_translation", "esolang.py",
+     ["compare_esoui_files_for_translation", "ko_client.str", "en_prv_client.str", "en_client.str"], []),
+    ("convert_xliff_to_tagged_lang_text", "esolang.py", ["convert_xliff_to_tagged_lang_text", "ko_tagged.xliff"], []),
+    ("korean_to_eso", "esolang.py", ["korean_to_eso", "ko_tagged.txt"], []),
+    ("extract_itemnames_raw_data", "esotools.py", ["extract_itemnames_raw_data", "en_itemnames.dat", "en_itemids.dat"], []),
+    ("rebuild_itemnames_binary", "esotools.py", ["rebuild_itemnames_binary", "en_itemnames_extracted_itemnames_raw.txt", "True"],
+     [["esotools.py", "extract_itemnames_raw_data", "en_itemnames.dat", "en_itemids.dat"]]),
+    ("build_lqd_mapindex_files", "esotools.py", ["build_lqd_mapindex_files", "LibQuestHelper.lua"], []),
+]
+
+
+def get_commit(revision=None):
+    """Returns (commit hash, True if the working tree has uncommitted changes to tracked files)."""
+    result = subprocess.run(["git", "rev-parse", revision or "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True)
+    commit = result.stdout.strip() or None
+    if revision:
+        return commit, False
+    status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                            capture_output=True, text=True)
+    return commit, bool(status.stdout.strip())
+
+
+def export_revision(revision, target):
+    """Writes the scripts and their modules as they were at revision into target."""
+    for filename in SCRIPT_FILES + SUPPORT_MODULES:
+        result = subprocess.run(["git", "show", f"{revision}:{filename}"], cwd=REPO_ROOT, capture_output=True)
+        if result.returncode == 0:
+            with open(os.path.join(target, filename), "wb") as f:
+                f.write(result.stdout)
+
+
+def run_command(script_folder, work_folder, script, command):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(script_folder, script)] + command,
+                            cwd=work_folder, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    elapsed = time.perf_counter() - start
+    if "Unknown function" in result.stdout:
+        return elapsed, "skipped"
+    if result.returncode != 0:
+        last_line = (result.stderr.strip().splitlines() or ["exit code %d" % result.returncode])[-1]
+        return elapsed, f"failed: {last_line}"
+    return elapsed, "ok"
+
+
+def run_benchmark(script_folder, data_folder, script, command, setup, runs):
+    """Returns {"status", "runs", "median_s", "min_s"} for one command over runs fresh copies of the data."""
+    times = []
+    status = "ok"
+    for _ in range(runs):
+        work_folder = tempfile.mkdtemp(prefix="esolang_bench_")
+        try:
+            for file_name in os.listdir(data_folder):
+                shutil.copy2(os.path.join(data_folder, file_name), work_folder)
+            for setup_script, *setup_command in setup:
+                _, setup_status = run_command(script_folder, work_folder, setup_script, setup_command)
+                if setup_status != "ok":
+                    return {"status": f"setup {setup_status}"}
+            elapsed, status = run_command(script_folder, work_folder, script, command)
+        finally:
+            shutil.rmtree(work_folder, ignore_errors=True)
+        if status != "ok":
+            return {"status": status}
+        times.append(elapsed)
+    return {
+        "status": status,
+        "runs": [round(t, 4) for t in times],
+        "median_s": round(statistics.median(times), 4),
+        "min_s": round(min(times), 4),
+    }
+
+
+def print_comparison(results, baseline):
+    print(f"\nCompared with {baseline.get('commit', '?')[:10]} ({baseline.get('label', '')})")
+    print(f"{'benchmark':<44}{'before s':>10}{'after s':>10}{'change':>9}")
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name, {})
+        if result.get("status") != "ok" or before.get("status") != "ok":
+            continue
+        ratio = result["median_s"] / before["median_s"] if before["median_s"] else float("nan")
+        print(f"{name:<44}{before['median_s']:>10.3f}{result['median_s']:>10.3f}{ratio:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the main commands on generated data.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per command; the median is reported (default: %(default)s).")
+    parser.add_argument("--scale", type=float, default=DEFAULT_SCALE, help="Data size, see generate_data.py (default: %(default)s).")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Data seed (default: %(default)s).")
+    parser.add_argument("--only", action="append", help="Only run benchmarks whose name contains this text (repeatable).")
+    parser.add_argument("--revision", help="Benchmark the scripts at this git revision instead of the working tree.")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/<commit>.json).")
+    parser.add_argument("--compare", metavar="FILE", help="Earlier JSON results file to compare against.")
+    args = parser.parse_args()
+
+    commit, dirty = get_commit(args.revision)
+    label = args.revision or ("working tree" + (" with uncommitted changes" if dirty else ""))
+    data_folder = tempfile.mkdtemp(prefix="esolang_bench_data_")
+    script_folder = REPO_ROOT
+    try:
+        generate_all(data_folder, args.seed, args.scale)
+        if args.revision:
+            script_folder = tempfile.mkdtemp(prefix="esolang_bench_scripts_")
+            export_revision(args.revision, script_folder)
+
+        print(f"Benchmarking {label} ({(commit or 'unknown')[:10]}), scale {args.scale}, seed {args.seed}, {args.runs} runs")
+        print(f"{'benchmark':<44}{'median s':>10}{'min s':>10}")
+        results = {}
+        for name, script, command, setup in BENCHMARKS:
+            if args.only and not any(text in name for text in args.only):
+                continue
+            result = run_benchmark(script_folder, data_folder, script, command, setup, args.runs)
+            results[name] = result
+            if result["status"] == "ok":
+                print(f"{name:<44}{result['median_s']:>10.3f}{result['min_s']:>10.3f}")
+            else:
+                print(f"{name:<44}  {result['status']}")
+    finally:
+        shutil.rmtree(data_folder, ignore_errors=True)
+        if script_folder != REPO_ROOT:
+            shutil.rmtree(script_folder, ignore_errors=True)
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "label": label,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "scale": args.scale,
+        "runs": args.runs,
+        "results": results,
+    }
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_FOLDER, exist_ok=True)
+        output = os.path.join(RESULTS_FOLDER, f"{(commit or 'unknown')[:10]}{'-dirty' if dirty else ''}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Measure start-up cost of the command line scripts.
+
+For each script this runs `python -X importtime -c "import <module>"` and reports the median
+cumulative import time, plus the median wall time of `python <script>.py list`, which is what a
+batch file pays per call. With --compare REV the same numbers are taken for the scripts as they
+were at git revision REV, so the effect of a change can be measured.
+
+Usage:
+    python benchmarks/startup_importtime.py [--runs N] [--top N] [--compare REV]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["esolang", "esotools", "esoutils", "esoKRFontPatcher"]
+SUPPORT_MODULES = ["esolua.py", "section_constants.py"]
+
+
+def parse_importtime(stderr):
+    """Returns [(cumulative microseconds, module name)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        rows.append((int(parts[1].strip()), parts[2].rstrip()))
+    return rows
+
+
+def measure_import(folder, module, runs):
+    totals = []
+    rows = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=folder, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed in {folder}:\n{result.stderr}")
+        rows = parse_importtime(result.stderr)
+        totals.append(next(us for us, name in reversed(rows) if name.strip() == module))
+    return statistics.median(totals) / 1000.0, rows
+
+
+def measure_cli(folder, module, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, f"{module}.py", "list"], cwd=folder, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000.0
+
+
+def export_revision(revision, target):
+    """Writes the scripts as they were at revision into target."""
+    for filename in [f"{name}.py" for name in SCRIPTS] + SUPPORT_MODULES:
+        result = subprocess.run(["git", "show", f"{revision}:{filename}"], cwd=REPO_ROOT, capture_output=True)
+        if result.returncode != 0:
+            continue
+        with open(os.path.join(target, filename), "wb") as f:
+            f.write(result.stdout)
+
+
+def report(label, folder, runs, top):
+    print(f"\n{label} ({folder})")
+    print(f"{'script':<18}{'import ms':>10}{'cli list ms':>13}")
+    for module in SCRIPTS:
+        if not os.path.exists(os.path.join(folder, f"{module}.py")):
+            continue
+        import_ms, rows = measure_import(folder, module, runs)
+        cli_ms = measure_cli(folder, module, runs)
+        print(f"{module:<18}{import_ms:>10.1f}{cli_ms:>13.1f}")
+        if top:
+            # Direct dependencies only: one level of indentation below the script itself
+            direct = [(us, name.strip()) for us, name in rows if name.startswith("  ") and not name.startswith("    ")]
+            for us, name in sorted(direct, reverse=True)[:top]:
+                print(f"    {name:<30}{us / 1000.0:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure script start-up time with -X importtime.")
+    parser.add_argument("--runs", type=int, default=7, help="Runs per measurement; the median is reported.")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest direct imports per script.")
+    parser.add_argument("--compare", metavar="REV", help="Also measure the scripts at this git revision.")
+    args = parser.parse_args()
+
+    report("Working tree", REPO_ROOT, args.runs, args.top)
+
+    if args.compare:
+        target = tempfile.mkdtemp(prefix="esolang_startup_")
+        try:
+            export_revision(args.compare, target)
+            report(f"Revision {args.compare}", target, args.runs, args.top)
+        finally:
+            shutil.rmtree(target, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
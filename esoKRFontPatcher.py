@@ -2,21 +2,30 @@
 import argparse
 import sys
 import os
-import inspect
 import re
-import struct
-import codecs
-import xml.etree.ElementTree as ET
-from icu import Locale, BreakIterator
-import datetime
 import time
+import stat
+import esoprofile
 
 # List to hold information about callable functions
 callable_functions = []
 
 
+def convert_cli_arg(value):
+    if isinstance(value, str):
+        if value == "True":
+            return True
+        if value == "False":
+            return False
+        if value == "None":
+            return None
+
+    return value
+
+
 def mainFunction(func):
-    """Decorator to mark functions as callable and add them to the list."""
+    """Decorator to mark functions as callable and add them to the list, measured when profiling is on."""
+    func = esoprofile.profiled(func)
     callable_functions.append(func)
     return func
 
@@ -28,6 +37,7 @@ def print_help():
 
 
 def print_docstrings():
+    import inspect
     print("Docstrings for callable functions:")
     for func in callable_functions:
         print("\nFunction: {}".format(func.__name__))
@@ -46,8 +56,15 @@ def main():
     parser.add_argument("--usage", action="store_true", help="Display usage information.")
     parser.add_argument("function", nargs="?", help="The name of the function to execute.")
     parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the function.")
+    parser.add_argument("--profile", action="store_true", help="Record time, memory and I/O of the function in esolang_metrics.jsonl.")
+    parser.add_argument("--profile-memory", action="store_true", help="Like --profile, and also trace Python allocations (slower).")
+    parser.add_argument("--cprofile", action="store_true", help="Like --profile, and also write a cProfile dump of the function.")
+    parser.add_argument("--stats", action="store_true", help="Print the phase timers and counters of the function when it finishes.")
 
     args = parser.parse_args()
+    if args.profile or args.profile_memory or args.cprofile:
+        esoprofile.enable(",".join(option for option, wanted in (
+            ("on", True), ("memory", args.profile_memory), ("cprofile", args.cprofile)) if wanted))
 
     if args.usage:
         print("Usage: esoKRFontPatcher.py function [args [args ...]]")
@@ -63,7 +80,10 @@ def main():
         function_name = args.function
         for func in callable_functions:
             if func.__name__ == function_name:
-                func(*args.args)
+                func_args = [convert_cli_arg(arg) for arg in args.args]
+                func(*func_args)
+                if args.stats:
+                    esoprofile.print_stats()
                 break
         else:
             print("Unknown function: {}".format(function_name))
@@ -101,6 +121,9 @@ SKIP_FOLDERS = {
 }
 
 LOG_FILE = "esoKR_font_patcher_log.txt"
+# Files known to hold no font references: relative path -> [size, mtime_ns, sha1]
+MANIFEST_FILE = "esoKR_font_patcher_manifest.json"
+MANIFEST_VERSION = 1
 
 
 # Helpers --------------------------------------------------------------------
@@ -130,6 +153,7 @@ def ensure_running_in_addons_root(current_folder, log_lines):
 
 
 def preflight_filesystem_probe(current_folder, log_lines):
+    import uuid
     if not os.access(current_folder, os.W_OK | os.X_OK):
         log_lines.append(
             f"Preflight failed: No write/execute permission in AddOns folder: {redact_username_from_path(current_folder)}. "
@@ -160,6 +184,16 @@ def read_text_file(path):
         return f.read()
 
 
+def read_binary_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def decode_text(data):
+    """Same decoding as read_text_file, for bytes that were already read."""
+    return data.decode("utf-8-sig", errors="ignore")
+
+
 def write_text_file(path, text):
     with open(path, "w", encoding="utf-8", newline="\n") as f:
         f.write(text)
@@ -171,28 +205,182 @@ def is_patchable_text_file(path):
 
 def walk_patchable_files(root_folder):
     for dirpath, dirnames, filenames in os.walk(root_folder):
-        dirnames[:] = [d for d in dirnames if d not in SKIP_FOLDERS]
+        # Sorted so the log lists files in the same order on every file system
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_FOLDERS)
 
-        for filename in filenames:
+        for filename in sorted(filenames):
+            # Our own log lists font paths and would otherwise be "patched" on every run
+            if filename == LOG_FILE:
+                continue
             path = os.path.join(dirpath, filename)
             if is_patchable_text_file(path):
                 yield path
 
 
+# One alternation over every FONT_REPLACEMENTS key, longest first so a key can never shadow a longer one
+reFontReference = re.compile(
+    "|".join(re.escape(old) for old in sorted(FONT_REPLACEMENTS, key=len, reverse=True))
+)
+
+# Same alternation over the UTF-8 bytes, so files without any reference are never decoded
+reFontReferenceBytes = re.compile(
+    b"|".join(re.escape(old.encode("utf-8")) for old in sorted(FONT_REPLACEMENTS, key=len, reverse=True))
+)
+
+
+def might_reference_fonts(data):
+    return reFontReferenceBytes.search(data) is not None
+
+
+def order_font_hits(hits):
+    """Returns the (old, new) pairs for the keys in hits, in FONT_REPLACEMENTS order for stable logs."""
+    return [(old, new) for old, new in FONT_REPLACEMENTS.items() if old in hits]
+
+
+def find_font_references(text):
+    hits = set(reFontReference.findall(text))
+    return order_font_hits(hits)
+
+
 def replace_font_references(text):
-    changed = False
-    replacements_made = []
+    hits = set()
 
-    for old, new in FONT_REPLACEMENTS.items():
-        if old in text:
-            text = text.replace(old, new)
-            changed = True
-            replacements_made.append((old, new))
+    def substitute(match):
+        old = match.group(0)
+        hits.add(old)
+        return FONT_REPLACEMENTS[old]
 
-    return text, changed, replacements_made
+    text = reFontReference.sub(substitute, text)
+    replacements_made = order_font_hits(hits)
+
+    return text, bool(replacements_made), replacements_made
+
+
+def write_patched_file(path, text):
+    try:
+        write_text_file(path, text)
+    except PermissionError:
+        os.chmod(path, stat.S_IWRITE)
+        write_text_file(path, text)
+
+
+def replacements_fingerprint():
+    """Changes whenever FONT_REPLACEMENTS does, so a manifest from another key set is ignored."""
+    import hashlib
+    import json
+    return hashlib.sha1(json.dumps(sorted(FONT_REPLACEMENTS.items())).encode("utf-8")).hexdigest()
+
+
+def load_manifest(manifest_path):
+    import json
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except Exception:
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("replacements") != replacements_fingerprint():
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(manifest_path, files):
+    import json
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "replacements": replacements_fingerprint(),
+        "files": files,
+    }
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+
+def read_unless_known(path, known):
+    """
+    Returns (data, entry, skipped). A file whose size and mtime match the manifest entry is
+    not opened; one whose content hash still matches is read but not scanned again.
+    """
+    import hashlib
+    st = os.stat(path)
+    if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+        return None, known, True
+
+    data = read_binary_file(path)
+    entry = [st.st_size, st.st_mtime_ns, hashlib.sha1(data).hexdigest()]
+    if known and known[2] == entry[2]:
+        return None, entry, True
+    return data, entry, False
+
+
+def scan_font_file(path, known=None):
+    """
+    Worker: returns (path, font references found, error line or None, manifest entry or None,
+    skipped) without modifying the file.
+    """
+    try:
+        data, entry, skipped = read_unless_known(path, known)
+    except Exception as e:
+        return path, [], f"Read error: {path}: {e}", None, False
+    if skipped:
+        return path, [], None, entry, True
+
+    if not might_reference_fonts(data):
+        return path, [], None, entry, False
+
+    found = find_font_references(decode_text(data))
+    return path, found, None, None if found else entry, False
+
+
+def patch_font_file(path, known=None):
+    """Worker: patches path in place; returns the same tuple as scan_font_file with the replacements made."""
+    import hashlib
+    try:
+        data, entry, skipped = read_unless_known(path, known)
+    except Exception as e:
+        return path, [], f"Read error: {path}: {e}", None, False
+    if skipped:
+        return path, [], None, entry, True
+
+    if not might_reference_fonts(data):
+        return path, [], None, entry, False
+
+    updated, changed, replacements = replace_font_references(decode_text(data))
+    if not changed:
+        return path, [], None, entry, False
+
+    try:
+        write_patched_file(path, updated)
+        st = os.stat(path)
+    except Exception as e:
+        return path, [], f"Write error: {path}: {e}", None, False
+
+    entry = [st.st_size, st.st_mtime_ns, hashlib.sha1(updated.encode("utf-8")).hexdigest()]
+    return path, replacements, None, entry, False
+
+
+def map_patchable_files(worker, root_folder, workers, manifest_files):
+    """
+    Runs worker over every patchable file on a thread pool; results come back in walk order.
+    manifest_files maps relative paths to the entries of files already known to be clean.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    def run(path):
+        return worker(path, manifest_files.get(os.path.relpath(path, root_folder)))
+
+    with ThreadPoolExecutor(max_workers=None if workers is None else max(1, int(workers))) as executor:
+        yield from executor.map(run, walk_patchable_files(root_folder))
+
+
+def record_manifest_entry(new_files, root_folder, path, entry):
+    if entry is not None:
+        new_files[os.path.relpath(path, root_folder)] = entry
 
 
 def write_log(log_lines):
+    import datetime
     with open(LOG_FILE, "w", encoding="utf-8", newline="\n") as out:
         out.write("EsoKR Font Patcher\n")
         out.write("Run: {}\n\n".format(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
@@ -202,11 +390,13 @@ def write_log(log_lines):
 
 # Main routines ---------------------------------------------------------------
 @mainFunction
-def list_font_references():
+def list_font_references(workers=None, full_rescan=False):
     """
     Scan patchable addon files and list files containing known ESO font references.
     Does not modify files.
     Must be run from the ESO AddOns root folder.
+    workers: number of threads reading files (default: ThreadPoolExecutor's default).
+    full_rescan: True to ignore esoKR_font_patcher_manifest.json and read every file.
     """
     current_folder = os.getcwd()
     log_lines = []
@@ -216,36 +406,52 @@ def list_font_references():
         print(f"Safety check failed. See {LOG_FILE}")
         return
 
+    manifest_path = os.path.join(current_folder, MANIFEST_FILE)
+    manifest_files = {} if full_rescan is True else load_manifest(manifest_path)
+    new_files = {}
+    files_skipped = 0
+
     match_count = 0
 
-    for path in walk_patchable_files(current_folder):
-        try:
-            text = read_text_file(path)
-        except Exception as e:
-            log_lines.append(f"Read error: {path}: {e}")
+    for path, found, error, entry, skipped in map_patchable_files(scan_font_file, current_folder, workers, manifest_files):
+        record_manifest_entry(new_files, current_folder, path, entry)
+        if skipped:
+            files_skipped += 1
             continue
 
-        found = [old for old in FONT_REPLACEMENTS if old in text]
+        if error:
+            log_lines.append(error)
+            continue
 
         if found:
             match_count += 1
             log_lines.append(f"Found font references in: {path}")
 
-            for old in found:
-                log_lines.append(f"  {old} -> {FONT_REPLACEMENTS[old]}")
+            for old, new in found:
+                log_lines.append(f"  {old} -> {new}")
 
     if match_count == 0:
         log_lines.append("No known font references found.")
 
+    if files_skipped:
+        log_lines.append(f"Skipped {files_skipped} files unchanged since the last scan (see {MANIFEST_FILE}).")
+
+    save_manifest(manifest_path, new_files)
+
     write_log(log_lines)
     print(f"Done. Files with font references: {match_count}. See {LOG_FILE}")
 
 
 @mainFunction
-def patch_addon_fonts():
+def patch_addon_fonts(workers=None, full_rescan=False):
     """
     Patch known ESO font references in Lua/XML/manifest text files to EsoKR font paths.
     Must be run from the ESO AddOns root folder.
+    workers: number of threads reading and patching files (default: ThreadPoolExecutor's default).
+    full_rescan: True to ignore esoKR_font_patcher_manifest.json and read every file.
+
+    Files without font references are recorded in esoKR_font_patcher_manifest.json with their
+    size, mtime and hash, and are not opened again on later runs until they change.
     """
     current_folder = os.getcwd()
     log_lines = []
@@ -260,31 +466,25 @@ def patch_addon_fonts():
         print(f"Preflight failed. See {LOG_FILE}")
         return
 
+    manifest_path = os.path.join(current_folder, MANIFEST_FILE)
+    manifest_files = {} if full_rescan is True else load_manifest(manifest_path)
+    new_files = {}
+    files_skipped = 0
+
     files_modified = 0
     replacements_total = 0
 
-    for path in walk_patchable_files(current_folder):
-        try:
-            original = read_text_file(path)
-        except Exception as e:
-            log_lines.append(f"Read error: {path}: {e}")
+    for path, replacements, error, entry, skipped in map_patchable_files(patch_font_file, current_folder, workers, manifest_files):
+        record_manifest_entry(new_files, current_folder, path, entry)
+        if skipped:
+            files_skipped += 1
             continue
 
-        updated, changed, replacements = replace_font_references(original)
-        if not changed:
+        if error:
+            log_lines.append(error)
             continue
 
-        try:
-            write_text_file(path, updated)
-        except PermissionError:
-            try:
-                os.chmod(path, stat.S_IWRITE)
-                write_text_file(path, updated)
-            except Exception as e:
-                log_lines.append(f"Write error: {path}: {e}")
-                continue
-        except Exception as e:
-            log_lines.append(f"Write error: {path}: {e}")
+        if not replacements:
             continue
 
         files_modified += 1
@@ -297,15 +497,22 @@ def patch_addon_fonts():
     if files_modified == 0:
         log_lines.append("No files were modified.")
 
+    if files_skipped:
+        log_lines.append(f"Skipped {files_skipped} files unchanged since the last scan (see {MANIFEST_FILE}).")
+
+    save_manifest(manifest_path, new_files)
+
     write_log(log_lines)
     print(f"Done. Files modified: {files_modified}. Replacement types hit: {replacements_total}. See {LOG_FILE}")
 
 
 @mainFunction
-def dry_run_patch_addon_fonts():
+def dry_run_patch_addon_fonts(workers=None, full_rescan=False):
     """
     Show what would be patched without modifying files.
     Must be run from the ESO AddOns root folder.
+    workers: number of threads reading files (default: ThreadPoolExecutor's default).
+    full_rescan: True to ignore esoKR_font_patcher_manifest.json and read every file.
     """
     current_folder = os.getcwd()
     log_lines = []
@@ -315,19 +522,25 @@ def dry_run_patch_addon_fonts():
         print(f"Safety check failed. See {LOG_FILE}")
         return
 
+    manifest_path = os.path.join(current_folder, MANIFEST_FILE)
+    manifest_files = {} if full_rescan is True else load_manifest(manifest_path)
+    new_files = {}
+    files_skipped = 0
+
     files_would_modify = 0
     replacements_total = 0
 
-    for path in walk_patchable_files(current_folder):
-        try:
-            text = read_text_file(path)
-        except Exception as e:
-            log_lines.append(f"Read error: {path}: {e}")
+    for path, replacements, error, entry, skipped in map_patchable_files(scan_font_file, current_folder, workers, manifest_files):
+        record_manifest_entry(new_files, current_folder, path, entry)
+        if skipped:
+            files_skipped += 1
             continue
 
-        _, changed, replacements = replace_font_references(text)
+        if error:
+            log_lines.append(error)
+            continue
 
-        if changed:
+        if replacements:
             files_would_modify += 1
             replacements_total += len(replacements)
             log_lines.append(f"Would patch: {path}")
@@ -338,6 +551,11 @@ def dry_run_patch_addon_fonts():
     if files_would_modify == 0:
         log_lines.append("No known font references would be patched.")
 
+    if files_skipped:
+        log_lines.append(f"Skipped {files_skipped} files unchanged since the last scan (see {MANIFEST_FILE}).")
+
+    save_manifest(manifest_path, new_files)
+
     write_log(log_lines)
     print(f"Done. Files that would be modified: {files_would_modify}. Replacement types hit: {replacements_total}. See {LOG_FILE}")
 
@@ -2,17 +2,14 @@
 import argparse
 import sys
 import os
-import inspect
 import re
 import struct
-import codecs
 from difflib import SequenceMatcher
-import section_constants as section
-import polib
-import xml.etree.ElementTree as ET
-from icu import Locale, BreakIterator
-from datetime import datetime
-from slpp import slpp as lua
+import codecs
+import esolua as lua
+import esoprofile
+import esoprogress
+import esosort
 
 """
 From powershell 6.1.7600.16385 you may see question marks rather then the Korean or Chinese text on windows 7.
@@ -38,11 +35,55 @@ def convert_cli_arg(value):
 
 
 def mainFunction(func):
-    """Decorator to mark functions as callable and add them to the list."""
+    """Decorator to mark functions as callable and add them to the list, measured when profiling is on."""
+    func = esoprofile.profiled(func)
     callable_functions.append(func)
     return func
 
 
+# Parsed input files shared by the steps of run_pipeline or serve, None when neither is running
+artifact_cache = None
+
+
+def copy_artifact(value):
+    """Returns a copy of a parsed file that a step can change without touching the cached value."""
+    if isinstance(value, tuple):
+        return tuple(copy_artifact(item) for item in value)
+    if isinstance(value, dict):
+        # readLangFile and read_tagged_text_to_dict nest one level of dicts
+        return {key: dict(item) if isinstance(item, dict) else item for key, item in value.items()}
+    return value
+
+
+def get_cached_artifact(reader, filename):
+    """Returns reader(filename) from artifact_cache, reading the file again if its size or mtime changed."""
+    file_stat = os.stat(filename)
+    key = (reader.__name__, os.path.abspath(filename))
+    signature = (file_stat.st_size, file_stat.st_mtime_ns)
+    cached = artifact_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        esoprofile.count("artifact cache hits")
+    else:
+        # The file changed (or was never read): parse it again and drop the old copy
+        esoprofile.count("artifact cache misses")
+        cached = (signature, reader(filename))
+        artifact_cache[key] = cached
+    return cached[1]
+
+
+def cachedArtifact(func):
+    """Decorator for file readers: while a pipeline runs, each file is parsed once per size and mtime."""
+    from functools import wraps
+
+    @wraps(func)
+    def wrapper(filename):
+        if artifact_cache is None:
+            return func(filename)
+        return copy_artifact(get_cached_artifact(func, filename))
+
+    return wrapper
+
+
 def print_help():
     print("Available callable functions:")
     for func in callable_functions:
@@ -50,6 +91,7 @@ def print_help():
 
 
 def print_docstrings():
+    import inspect
     print("Docstrings for callable functions:")
     for func in callable_functions:
         print("\nFunction: {}".format(func.__name__))
@@ -68,8 +110,15 @@ def main():
     parser.add_argument("--usage", action="store_true", help="Display usage information.")
     parser.add_argument("function", nargs="?", help="The name of the function to execute.")
     parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the function.")
+    parser.add_argument("--profile", action="store_true", help="Record time, memory and I/O of the function in esolang_metrics.jsonl.")
+    parser.add_argument("--profile-memory", action="store_true", help="Like --profile, and also trace Python allocations (slower).")
+    parser.add_argument("--cprofile", action="store_true", help="Like --profile, and also write a cProfile dump of the function.")
+    parser.add_argument("--stats", action="store_true", help="Print the phase timers and counters of the function when it finishes.")
 
     args = parser.parse_args()
+    if args.profile or args.profile_memory or args.cprofile:
+        esoprofile.enable(",".join(option for option, wanted in (
+            ("on", True), ("memory", args.profile_memory), ("cprofile", args.cprofile)) if wanted))
 
     if args.usage:
         print("Usage: esolang.py function [args [args ...]]")
@@ -90,6 +139,8 @@ def main():
                     print("Usage: {} <txtFilename> <idFilename>".format(func.__name__))
                 else:
                     func(*func_args)
+                    if args.stats:
+                        esoprofile.print_stats()
                 break
         else:
             print("Unknown function: {}".format(function_name))
@@ -172,14 +223,17 @@ SPECIAL_LANGUAGE_NAMES = {
 
 # Helper for escaped chars ----------------------------------------------------
 def get_section_name(section_id):
+    import section_constants as section
     return section.section_info.get(section_id, {}).get("sectionName")
 
 
 def get_num_strings(section_id):
+    import section_constants as section
     return section.section_info.get(section_id, {}).get("numStrings")
 
 
 def get_max_string_length(section_id):
+    import section_constants as section
     return section.section_info.get(section_id, {}).get("maxStringLength")
 
 
@@ -319,25 +373,64 @@ def readExtendedChar(file):
     return char_bytes, shift
 
 
-def readNullStringByChar(offset, start, file):
-    """Reads a null-terminated UTF-8 string one char at a time, preserving raw binary bytes."""
-    currentPosition = file.tell()
-    file.seek(start + offset)
+# Bytes read per call when scanning a binary file for null terminators
+NULL_SCAN_CHUNK_SIZE = 64 * 1024
+# Bytes read per call when looking up one string at an offset; most strings end within it,
+# and readLangFile is about a third slower with NULL_SCAN_CHUNK_SIZE reads per string
+NULL_STRING_CHUNK_SIZE = 1024
 
-    nullChar = False
-    textLine = b''
 
-    while not nullChar:
-        char, shift = readExtendedChar(file)
-        if not char:
+def read_null_terminated(file, position, chunk_size=NULL_STRING_CHUNK_SIZE):
+    """
+    Reads the bytes from position up to, but not including, the next null terminator or EOF.
+
+    Args:
+        file (file): The binary file object to read from.
+        position (int): Absolute file position where the string starts.
+        chunk_size (int): Bytes read per call while looking for the terminator.
+
+    Returns:
+        bytes: The raw string bytes. The file position is left after the last chunk read.
+    """
+    file.seek(position)
+    parts = []
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
             break  # EOF
+        null_index = chunk.find(b'\x00')
+        if null_index >= 0:
+            parts.append(chunk[:null_index])
+            break
+        parts.append(chunk)
+    return b''.join(parts)
 
-        if char == b'\x00':
-            nullChar = True
+
+def iter_null_strings(file, chunk_size=NULL_SCAN_CHUNK_SIZE):
+    """
+    Yields every null-terminated byte string from the current file position to EOF.
+
+    The file is read in large blocks that are split on b'\x00'. Consecutive terminators yield b'',
+    and trailing bytes without a terminator are yielded as a final string.
+    """
+    remainder = b''
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
             break
+        if remainder:
+            chunk = remainder + chunk
+        parts = chunk.split(b'\x00')
+        remainder = parts.pop()
+        yield from parts
+    if remainder:
+        yield remainder
 
-        textLine = b''.join([textLine, char])
 
+def readNullStringByChar(offset, start, file):
+    """Reads a null-terminated UTF-8 string, preserving raw binary bytes."""
+    currentPosition = file.tell()
+    textLine = read_null_terminated(file, start + offset)
     file.seek(currentPosition)
     return textLine
 
@@ -353,28 +446,13 @@ def readNullString(offset, start, file):
     Returns:
         bytes: The read null-terminated string.
     """
-    chunkSize = 1024
-    nullChar = False
-    textLine = b''
     currentPosition = file.tell()
-    file.seek(start + offset)
-    while not nullChar:
-        chunk = file.read(chunkSize)
-        if not chunk:
-            # End of file
-            break
-        null_index = chunk.find(b"\x00")
-        if null_index >= 0:
-            # Found the null terminator within the chunk
-            textLine += chunk[:null_index]
-            nullChar = True
-        else:
-            # Null terminator not found in this chunk, so append the whole chunk to textLine
-            textLine += chunk
+    textLine = read_null_terminated(file, start + offset)
     file.seek(currentPosition)
     return textLine
 
 
+@cachedArtifact
 def readTaggedLangFile(taggedFile):
     """
     Read a tagged language file and return a dictionary mapping tags to text.
@@ -409,6 +487,7 @@ def calculate_similarity_and_threshold(text1, text2):
     subText1 = reGrammaticalSuffix.sub('', subText1)
     subText2 = reGrammaticalSuffix.sub('', subText2)
 
+    esoprofile.count("SequenceMatcher calls")
     similarity_ratio = SequenceMatcher(None, subText1, subText2).ratio()
     return text1 == text2 or similarity_ratio > 0.6
 
@@ -422,6 +501,7 @@ def calculate_similarity_ratio(text1, text2):
     subText1 = reGrammaticalSuffix.sub('', subText1)
     subText2 = reGrammaticalSuffix.sub('', subText2)
 
+    esoprofile.count("SequenceMatcher calls")
     similarity_ratio = SequenceMatcher(None, subText1, subText2).ratio()
     return similarity_ratio > 0.6
 
@@ -447,6 +527,7 @@ def calculate_english_fallback_similarity_ratio(text1, text2):
     subText1 = reGrammaticalSuffix.sub('', subText1)
     subText2 = reGrammaticalSuffix.sub('', subText2)
 
+    esoprofile.count("SequenceMatcher calls")
     similarity_ratio = SequenceMatcher(None, subText1, subText2).ratio()
     return 0.73 < similarity_ratio < 0.95
 
@@ -511,6 +592,7 @@ def writeUInt64(file, value): file.write(struct.pack('>Q', value))
 
 
 def is_valid_language_code(code):
+    from icu import Locale
     try:
         loc = Locale(code)
         return bool(loc.getLanguage())  # returns False if language is invalid
@@ -666,6 +748,7 @@ def get_icu_locale_from_filename(filename):
 
 
 def get_crowdin_po_metadata(filename):
+    from datetime import datetime
     basename = os.path.basename(filename)
     match = reFilenamePrefix.match(basename)
     if not match:
@@ -684,6 +767,12 @@ def get_crowdin_po_metadata(filename):
     }
 
 
+def write_po_entry(po_out, entry):
+    """Appends a polib entry to a .po file whose header was written with str(POFile), as POFile.save() formats it."""
+    po_out.write("\n")
+    po_out.write(str(entry))
+
+
 def parse_safe_add_string_line(line):
     maSafeAddString = re.match(r'^SafeAddString\((.*?), "(.*)", \d{1,2}\)$', line)
     maSAS = re.match(r'^SAS\((.*?), "(.*)", \d{1,2}\)$', line)
@@ -821,6 +910,50 @@ def remove_index_from_lang_file(txtFilename):
     print(f"Output written to: {output_filename}")
 
 
+def convert_korean_to_eso_stream(textIns, out):
+    """Reads UTF-8 bytes from textIns and writes the Korean text shifted into the Chinese range to out."""
+    not_eof = True
+    while not_eof:
+        shift = 1
+        char = textIns.read(shift)
+        value = int.from_bytes(char, "big")
+        next_char = None
+        if value > 0x00 and value <= 0x74:
+            shift = 1
+        elif value >= 0xc0 and value <= 0xdf:
+            shift = 2
+        elif value >= 0xe0 and value <= 0xef:
+            shift = 3
+        elif value >= 0xf0 and value <= 0xf7:
+            shift = 4
+        if shift > 1:
+            next_char = textIns.read(shift - 1)
+        if next_char:
+            char = b''.join([char, next_char])
+        if not char:
+            # eof
+            break
+        temp = int.from_bytes(char, "big")
+        if temp >= 0xE18480 and temp <= 0xE187BF:
+            temp = temp + 0x43400
+        elif temp > 0xE384B0 and temp <= 0xE384BF:
+            temp = temp + 0x237D0
+        elif temp > 0xE38580 and temp <= 0xE3868F:
+            temp = temp + 0x23710
+        elif temp >= 0xEAB080 and temp <= 0xED9EAC:
+            if temp >= 0xEAB880 and temp <= 0xEABFBF:
+                temp = temp - 0x33800
+            elif temp >= 0xEBB880 and temp <= 0xEBBFBF:
+                temp = temp - 0x33800
+            elif temp >= 0xECB880 and temp <= 0xECBFBF:
+                temp = temp - 0x33800
+            else:
+                temp = temp - 0x3F800
+        char = temp.to_bytes(shift, byteorder='big')
+        outText = codecs.decode(char, "UTF-8")
+        out.write(outText)
+
+
 @mainFunction
 def korean_to_eso(txtFilename):
     """
@@ -853,52 +986,57 @@ def korean_to_eso(txtFilename):
     """
     output_filename, _ = generate_output_filename(txtFilename, "koreanToEso")
 
-    not_eof = True
     with open(txtFilename, 'rb') as textIns:
         with open(output_filename, 'w', encoding="utf8", newline='\n') as out:
-            while not_eof:
-                shift = 1
-                char = textIns.read(shift)
-                value = int.from_bytes(char, "big")
-                next_char = None
-                if value > 0x00 and value <= 0x74:
-                    shift = 1
-                elif value >= 0xc0 and value <= 0xdf:
-                    shift = 2
-                elif value >= 0xe0 and value <= 0xef:
-                    shift = 3
-                elif value >= 0xf0 and value <= 0xf7:
-                    shift = 4
-                if shift > 1:
-                    next_char = textIns.read(shift - 1)
-                if next_char:
-                    char = b''.join([char, next_char])
-                if not char:
-                    # eof
-                    break
-                temp = int.from_bytes(char, "big")
-                if temp >= 0xE18480 and temp <= 0xE187BF:
-                    temp = temp + 0x43400
-                elif temp > 0xE384B0 and temp <= 0xE384BF:
-                    temp = temp + 0x237D0
-                elif temp > 0xE38580 and temp <= 0xE3868F:
-                    temp = temp + 0x23710
-                elif temp >= 0xEAB080 and temp <= 0xED9EAC:
-                    if temp >= 0xEAB880 and temp <= 0xEABFBF:
-                        temp = temp - 0x33800
-                    elif temp >= 0xEBB880 and temp <= 0xEBBFBF:
-                        temp = temp - 0x33800
-                    elif temp >= 0xECB880 and temp <= 0xECBFBF:
-                        temp = temp - 0x33800
-                    else:
-                        temp = temp - 0x3F800
-                char = temp.to_bytes(shift, byteorder='big')
-                outText = codecs.decode(char, "UTF-8")
-                out.write(outText)
+            convert_korean_to_eso_stream(textIns, out)
 
     print(f"Output written to: {output_filename}")
 
 
+def convert_eso_to_korean_stream(textIns, out):
+    """Reads UTF-8 bytes from textIns and writes the text shifted back to Korean to out."""
+    not_eof = True
+    while not_eof:
+        shift = 1
+        char = textIns.read(shift)
+        value = int.from_bytes(char, "big")
+        next_char = None
+        if value > 0x00 and value <= 0x74:
+            shift = 1
+        elif value >= 0xc0 and value <= 0xdf:
+            shift = 2
+        elif value >= 0xe0 and value <= 0xef:
+            shift = 3
+        elif value >= 0xf0 and value <= 0xf7:
+            shift = 4
+        if shift > 1:
+            next_char = textIns.read(shift - 1)
+        if next_char:
+            char = b''.join([char, next_char])
+        if not char:
+            # eof
+            break
+        temp = int.from_bytes(char, "big")
+        if temp >= 0xE5B880 and temp <= 0xE5BBBF:
+            temp = temp - 0x43400
+        elif temp > 0xE5BC80 and temp <= 0xE5BC8F:
+            temp = temp - 0x237D0
+        elif temp > 0xE5BC90 and temp <= 0xE5BD9F:
+            temp = temp - 0x23710
+        elif temp >= 0xE6B880 and temp <= 0xE9A6AC:
+            if temp >= 0xE78080 and temp <= 0xE787BF:
+                temp = temp + 0x33800
+            elif temp >= 0xE88080 and temp <= 0xE887BF:
+                temp = temp + 0x33800
+            elif temp >= 0xE98080 and temp <= 0xE987BF:
+                temp = temp + 0x33800
+            else:
+                temp = temp + 0x3F800
+        char = temp.to_bytes(shift, byteorder='big')
+        outText = codecs.decode(char, "UTF-8")
+        out.write(outText)
+
+
 @mainFunction
 def eso_to_korean(txtFilename):
     """
@@ -932,48 +1070,9 @@ def eso_to_korean(txtFilename):
     """
     output_filename, _ = generate_output_filename(txtFilename, "esoToKorean")
 
-    not_eof = True
     with open(txtFilename, 'rb') as textIns:
         with open(output_filename, 'w', encoding="utf8", newline='\n') as out:
-            while not_eof:
-                shift = 1
-                char = textIns.read(shift)
-                value = int.from_bytes(char, "big")
-                next_char = None
-                if value > 0x00 and value <= 0x74:
-                    shift = 1
-                elif value >= 0xc0 and value <= 0xdf:
-                    shift = 2
-                elif value >= 0xe0 and value <= 0xef:
-                    shift = 3
-                elif value >= 0xf0 and value <= 0xf7:
-                    shift = 4
-                if shift > 1:
-                    next_char = textIns.read(shift - 1)
-                if next_char:
-                    char = b''.join([char, next_char])
-                if not char:
-                    # eof
-                    break
-                temp = int.from_bytes(char, "big")
-                if temp >= 0xE5B880 and temp <= 0xE5BBBF:
-                    temp = temp - 0x43400
-                elif temp > 0xE5BC80 and temp <= 0xE5BC8F:
-                    temp = temp - 0x237D0
-                elif temp > 0xE5BC90 and temp <= 0xE5BD9F:
-                    temp = temp - 0x23710
-                elif temp >= 0xE6B880 and temp <= 0xE9A6AC:
-                    if temp >= 0xE78080 and temp <= 0xE787BF:
-                        temp = temp + 0x33800
-                    elif temp >= 0xE88080 and temp <= 0xE887BF:
-                        temp = temp + 0x33800
-                    elif temp >= 0xE98080 and temp <= 0xE987BF:
-                        temp = temp + 0x33800
-                    else:
-                        temp = temp + 0x3F800
-                char = temp.to_bytes(shift, byteorder='big')
-                outText = codecs.decode(char, "UTF-8")
-                out.write(outText)
+            convert_eso_to_korean_stream(textIns, out)
 
     print(f"Output written to: {output_filename}")
 
@@ -1202,17 +1301,10 @@ def convert_lua_to_str_file(input_filename):
     """
     output_filename, _ = generate_output_filename(input_filename, file_extension="str")
 
-    entries = []
-
+    # Sort by the key (SI_... name) within the esosort memory budget
     with open(input_filename, "r", encoding="utf-8") as infile:
-        for line in infile:
-            line = line.strip()
-            parsed = parse_safe_add_string_line(line)
-            if parsed:
-                entries.append(parsed)
-
-    # Sort by the key (SI_... name)
-    entries.sort(key=lambda pair: pair[0])
+        parsed_lines = (parse_safe_add_string_line(line.strip()) for line in infile)
+        entries = esosort.sort_records(parsed for parsed in parsed_lines if parsed)
 
     with open(output_filename, "w", encoding="utf-8", newline="\n") as outfile:
         for key, value in entries:
@@ -1221,6 +1313,7 @@ def convert_lua_to_str_file(input_filename):
     print(f"Done. Output written to {output_filename}")
 
 
+@cachedArtifact
 def readLangFile(languageFileName):
     """Read a language file and extract index and string information.
 
@@ -1230,6 +1323,8 @@ def readLangFile(languageFileName):
     Returns:
         dict, dict: Dictionaries containing index and string information.
     """
+    timer = esoprofile.PhaseTimer("readLangFile")
+    timer.phase("read")
     with open(languageFileName, 'rb') as lineIn:
         numSections = readUInt32(lineIn)
         numIndexes = readUInt32(lineIn)
@@ -1239,7 +1334,7 @@ def readLangFile(languageFileName):
         fileIndexes = {'numIndexes': numIndexes, 'numSections': numSections}
         fileStrings = {'stringCount': stringCount}
 
-        for index in range(numIndexes):
+        for index in esoprogress.track(range(numIndexes), f"Reading {os.path.basename(languageFileName)}", unit="entries"):
             chunk = lineIn.read(16)
             sectionId, sectionIndex, stringIndex, stringOffset = struct.unpack('>IIII', chunk)
             indexString = readNullString(stringOffset, stringsStartPosition, lineIn)
@@ -1265,6 +1360,8 @@ def readLangFile(languageFileName):
                 predictedOffset += (len(indexString) + 1)
         fileStrings['stringCount'] = stringCount
 
+    timer.stop()
+    esoprofile.count("lang entries read", numIndexes)
     return fileIndexes, fileStrings
 
 
@@ -1309,6 +1406,7 @@ def writeLangFile(languageFileName, fileIndexes, fileStrings):
 
 
 def processSectionIDs(currentFileIndexes, outputFileName):
+    import section_constants as section
     numIndexes = currentFileIndexes['numIndexes']
     currentSection = None
     sectionCount = 1
@@ -1389,6 +1487,20 @@ def build_section_constants(currentLanguageFile):
     print("Section constants written to:", outputFileName)
 
 
+def format_tagged_section_entry(entry):
+    """Returns one readLangFile entry as a {{sectionId-sectionIndex-stringId:}}text line."""
+    secId = entry['sectionId']
+    secIdx = entry['sectionIndex']
+    strIdx = entry['stringIndex']
+    raw_bytes = entry['string']
+    preserved_nbsp = preserve_nbsp_bytes(raw_bytes)
+    escaped_bytes = preserve_escaped_sequences_bytes(preserved_nbsp)
+    utf8_string = bytes(escaped_bytes).decode("utf8", errors="replace")
+    formatted = f"{{{{{secId}-{secIdx}-{strIdx}:}}}}{utf8_string}"
+    lineOut = restore_escaped_sequences(formatted)
+    return f"{lineOut}\n"
+
+
 @mainFunction
 def extract_section_entries(langFile, section_arg, output_filename=None, output_folder=None, useName=True):
     """
@@ -1426,16 +1538,7 @@ def extract_section_entries(langFile, section_arg, output_filename=None, output_
         for i in range(fileIndexes['numIndexes']):
             entry = fileIndexes[i]
             if entry['sectionId'] == section_id:
-                secId = entry['sectionId']
-                secIdx = entry['sectionIndex']
-                strIdx = entry['stringIndex']
-                raw_bytes = entry['string']
-                preserved_nbsp = preserve_nbsp_bytes(raw_bytes)
-                escaped_bytes = preserve_escaped_sequences_bytes(preserved_nbsp)
-                utf8_string = bytes(escaped_bytes).decode("utf8", errors="replace")
-                formatted = f"{{{{{secId}-{secIdx}-{strIdx}:}}}}{utf8_string}"
-                lineOut = restore_escaped_sequences(formatted)
-                out.write(f"{lineOut}\n")
+                out.write(format_tagged_section_entry(entry))
 
     print(f"Done. Extracted entries from section {section_id} to {output_path}")
 
@@ -1445,38 +1548,53 @@ def extract_all_sections(langFile):
     """
     Extract every known section from a .lang file.
 
-    For each section in section.section_info, this calls extract_section_entries() with that section ID
-    and writes the tagged output into the tagged_text folder. Because useName=True is passed, each output
-    file is generated with the section ID and section name when possible.
+    The .lang file is read once and its entries are grouped by section ID. For each section in
+    section.section_info, the entries are written to the tagged_text folder under the same filename
+    extract_section_entries() would use with useName=True, so each output file is named with the
+    section ID and section name when possible. Sections without entries get an empty file.
 
     Args:
         langFile (str): Path to the input .lang file (e.g., 'en_cur.lang').
     """
-    for section_id, section_data in section.section_info.items():
-        section_name = section_data.get('sectionName')
-        print(f"Processing section: {section_id} ({section_name})...")
-        extract_section_entries(
-            langFile=langFile,
-            section_arg=section_id,
-            output_filename=None,
-            output_folder="tagged_text",
-            useName=True
+    import section_constants as section
+    timer = esoprofile.PhaseTimer("extract_all_sections")
+    timer.phase("read")
+    fileIndexes, _ = readLangFile(langFile)
+
+    timer.phase("group")
+    section_lines = {section_id: [] for section_id in section.section_info}
+    for i in range(fileIndexes['numIndexes']):
+        entry = fileIndexes[i]
+        lines = section_lines.get(entry['sectionId'])
+        if lines is not None:
+            lines.append(format_tagged_section_entry(entry))
+
+    timer.phase("write")
+    extracted_count = 0
+    for section_id, lines in esoprogress.track(list(section_lines.items()), "Writing sections", unit="sections"):
+        output_path, _ = generate_output_filename(
+            translated_file=langFile,
+            section_id=section_id,
+            use_section_name=True,
+            output_folder="tagged_text"
         )
+        with open(output_path, "w", encoding="utf8", newline='\n') as out:
+            out.writelines(lines)
+        extracted_count += len(lines)
 
+    timer.stop()
+    esoprofile.count("sections written", len(section_lines))
+    print(f"Done. Extracted {extracted_count} entries from {len(section_lines)} sections to tagged_text")
 
-def process_eosui_client_file(input_filename):
+
+def iter_eosui_client_records(input_filename):
     """
-    Read and process an ESOUI text file (e.g., en_client.str or en_pregame.str)
-    and return a dictionary of extracted key-text entries.
+    Yield (key, text) for each entry of an ESOUI text file (e.g., en_client.str or en_pregame.str)
+    in file order. A key that appears twice is yielded twice.
 
     Args:
         input_filename (str): The filename of the ESOUI text file to process.
-
-    Returns:
-        dict: A dictionary mapping keys to extracted text.
     """
-    text_dict = {}
-
     with open(input_filename, 'r', encoding="utf8") as textIns:
         for line in textIns:
             line = line.rstrip()
@@ -1486,13 +1604,46 @@ def process_eosui_client_file(input_filename):
 
             if maEmptyString:
                 conIndex = maEmptyString.group(1)
-                text_dict[conIndex] = ""
+                yield conIndex, ""
             elif maClientUntaged:
                 conIndex = maClientUntaged.group(1)
                 conText = maClientUntaged.group(2) if maClientUntaged.group(2) is not None else ""
-                text_dict[conIndex] = conText
+                yield conIndex, conText
 
-    return text_dict
+
+def iter_client_string_records(input_filename):
+    """Yield (key, text) for each [KEY] = "text" line of a .str file, skipping font lines, as create_po_from_esoui reads them."""
+    with open(input_filename, 'r', encoding='utf-8') as textIns:
+        for line in textIns:
+            if reFontTag.match(line):
+                continue
+            m = reClientUntaged.match(line)
+            if m:
+                yield m.group(1), m.group(2)
+
+
+def iter_stripped_tagged_records(tagged_filename):
+    """Yield (key, text) for each {{key:}}text line of a tagged file, with surrounding whitespace stripped from each line."""
+    with open(tagged_filename, 'r', encoding='utf-8') as textIns:
+        for line in textIns:
+            m = reLangIndex.match(line.strip())
+            if m:
+                yield m.group(1), m.group(2)
+
+
+@cachedArtifact
+def process_eosui_client_file(input_filename):
+    """
+    Read and process an ESOUI text file (e.g., en_client.str or en_pregame.str)
+    and return a dictionary of extracted key-text entries.
+
+    Args:
+        input_filename (str): The filename of the ESOUI text file to process.
+
+    Returns:
+        dict: A dictionary mapping keys to extracted text.
+    """
+    return dict(iter_eosui_client_records(input_filename))
 
 
 @mainFunction
@@ -1526,22 +1677,15 @@ def combine_client_files(client_filename, pregame_filename):
             [SI_CONSTANT] = "Some Constant Text"
             [SI_ADDITIONAL_CONSTANT] = "Additional Constant Text"
     """
+    import itertools
     output_filename, _ = generate_output_filename(client_filename, "combined_files")
 
-    textClientDict = process_eosui_client_file(client_filename)
-    textPregameDict = process_eosui_client_file(pregame_filename)
-
-    # Merge into single output dictionary
-    mergedDict = {}
-    mergedDict.update(textClientDict)
-    mergedDict.update(textPregameDict)
-
-    # Sort keys alphabetically
-    sorted_keys = sorted(mergedDict.keys())
+    # Sort keys alphabetically; for a key in both files the pregame text comes last and wins
+    combined = itertools.chain(iter_eosui_client_records(client_filename), iter_eosui_client_records(pregame_filename))
+    merged = esosort.last_per_key(esosort.sort_records(combined))
 
     with open(output_filename, 'w', encoding="utf8", newline='\n') as out:
-        for conIndex in sorted_keys:
-            conText = mergedDict[conIndex]
+        for conIndex, conText in merged:
             if conText == "":
                 lineOut = f'[{conIndex}] = ""'
             else:
@@ -1558,6 +1702,7 @@ def find_long_po_entries(po_file, limit=512):
     """
     Find translation entries whose text exceeds 512 characters.
     """
+    import polib
     po = polib.pofile(po_file)
     for entry in po:
         if len(entry.msgid) > limit:
@@ -1620,6 +1765,8 @@ def get_preferred_po_split_positions(text, locale):
     Extra positions are added for protected \\n and whitespace.
     Unsafe positions inside ESO placeholders or protected markers are removed.
     """
+    from icu import BreakIterator, Locale
+    esoprofile.count("ICU split calls")
     positions = set()
 
     # ICU language-aware word boundaries.
@@ -1770,64 +1917,51 @@ def create_po_from_esoui(translated_input_file, english_input_file, isBaseEnglis
         english_input_file (str): Path to the English .str file.
         isBaseEnglish (bool): If True, produces a base .po with empty msgstr fields.
     """
+    import polib
     po = polib.POFile()
     po.metadata = get_crowdin_po_metadata(translated_input_file)
     output_filename, _ = generate_output_filename(translated_input_file, "esoui_client_strings", file_extension="po")
     locale_translated = get_icu_locale_from_filename(translated_input_file)
     locale_english = get_icu_locale_from_filename(english_input_file)
-    english_map = {}
-    translated_map = {}
 
-    with open(english_input_file, 'r', encoding='utf-8') as f_en:
-        for line in f_en:
-            if reFontTag.match(line):
-                continue
-            m = reClientUntaged.match(line)
-            if m:
-                k, v = m.group(1), m.group(2)
-                english_map[k] = v
+    # Both files are sorted by key within the esosort memory budget and paired, and the
+    # entries are written as they are built instead of being collected in the POFile
+    english_records = esosort.last_per_key(esosort.sort_records(iter_client_string_records(english_input_file)))
+    translated_records = []
+    if not isBaseEnglish:
+        translated_records = esosort.last_per_key(esosort.sort_records(iter_client_string_records(translated_input_file)))
 
-    with open(translated_input_file, 'r', encoding='utf-8') as f_tr:
-        for line in f_tr:
-            if reFontTag.match(line):
-                continue
-            m = reClientUntaged.match(line)
-            if m:
-                k, v = m.group(1), m.group(2)
-                translated_map[k] = v
-
-    keys = sorted(english_map.keys())
-    for key in keys:
-        msgid_full = english_map.get(key, "")
-        msgstr_full = "" if isBaseEnglish else translated_map.get(key, "")
-
-        msgid_chunks, msgid_chunk_count = split_if_long(msgid_full, locale=locale_english)
-        msgstr_chunks, msgstr_chunk_count = split_if_long(msgstr_full, locale=locale_translated)
-
-        if msgstr_chunk_count < msgid_chunk_count:
-            msgstr_chunks += [""] * (msgid_chunk_count - msgstr_chunk_count)
-        elif msgstr_chunk_count > msgid_chunk_count:
-            msgid_chunks += [""] * (msgstr_chunk_count - msgid_chunk_count)
-            msgid_chunk_count = msgstr_chunk_count
-
-        if msgid_chunk_count == 1:
-            entry = polib.POEntry(
-                msgctxt=key,
-                msgid=msgid_chunks[0],
-                msgstr=msgstr_chunks[0]
-            )
-            po.append(entry)
-        else:
-            for i, (msgid, msgstr) in enumerate(zip(msgid_chunks, msgstr_chunks), start=1):
-                chunked_key = f"{key}:{i},{msgid_chunk_count}"
+    with open(output_filename, "w", encoding=po.encoding) as po_out:
+        po_out.write(str(po))
+        for (key, msgid_full), translated_record in esosort.join_sorted(english_records, translated_records):
+            msgstr_full = "" if translated_record is None else translated_record[1]
+
+            msgid_chunks, msgid_chunk_count = split_if_long(msgid_full, locale=locale_english)
+            msgstr_chunks, msgstr_chunk_count = split_if_long(msgstr_full, locale=locale_translated)
+
+            if msgstr_chunk_count < msgid_chunk_count:
+                msgstr_chunks += [""] * (msgid_chunk_count - msgstr_chunk_count)
+            elif msgstr_chunk_count > msgid_chunk_count:
+                msgid_chunks += [""] * (msgstr_chunk_count - msgid_chunk_count)
+                msgid_chunk_count = msgstr_chunk_count
+
+            if msgid_chunk_count == 1:
                 entry = polib.POEntry(
-                    msgctxt=chunked_key,
-                    msgid=msgid,
-                    msgstr=msgstr
+                    msgctxt=key,
+                    msgid=msgid_chunks[0],
+                    msgstr=msgstr_chunks[0]
                 )
-                po.append(entry)
+                write_po_entry(po_out, entry)
+            else:
+                for i, (msgid, msgstr) in enumerate(zip(msgid_chunks, msgstr_chunks), start=1):
+                    chunked_key = f"{key}:{i},{msgid_chunk_count}"
+                    entry = polib.POEntry(
+                        msgctxt=chunked_key,
+                        msgid=msgid,
+                        msgstr=msgstr
+                    )
+                    write_po_entry(po_out, entry)
 
-    po.save(output_filename)
     print(f"Done. Created .po file: {output_filename}")
 
 
@@ -1841,60 +1975,61 @@ def create_po_from_tagged_lang_text(translated_input_file, english_input_file, i
         translated_txt (str): Translated tagged file (e.g., kr_tagged_kr.txt).
         english_txt (str): English tagged file (e.g., en_tagged.txt).
     """
+    import polib
+    timer = esoprofile.PhaseTimer("create_po_from_tagged_lang_text")
+    timer.phase("read")
     po = polib.POFile()
     po.metadata = get_crowdin_po_metadata(translated_input_file)
     output_po, _ = generate_output_filename(translated_input_file, file_extension="po")
     locale_translated = get_icu_locale_from_filename(translated_input_file)
     locale_english = get_icu_locale_from_filename(english_input_file)
-    english_map = {}
-    translated_map = {}
 
-    with open(english_input_file, 'r', encoding='utf-8') as f_en:
-        for line in f_en:
-            m = reLangIndex.match(line.strip())
-            if m:
-                key, text = m.group(1), m.group(2)
-                english_map[key] = text
-
-    with open(translated_input_file, 'r', encoding='utf-8') as f_trans:
-        for line in f_trans:
-            m = reLangIndex.match(line.strip())
-            if m:
-                key, text = m.group(1), m.group(2)
-                translated_map[key] = text
-
-    for key in sorted(english_map):
-        msgid_full = english_map.get(key, "")
-        msgstr_full = "" if isBaseEnglish else translated_map.get(key, "")
-
-        msgid_chunks, msgid_chunk_count = split_if_long(msgid_full, locale=locale_english)
-        msgstr_chunks, msgstr_chunk_count = split_if_long(msgstr_full, locale=locale_translated)
-
-        # Pad shorter list with empty strings
-        if msgstr_chunk_count < msgid_chunk_count:
-            msgstr_chunks += [""] * (msgid_chunk_count - msgstr_chunk_count)
-        elif msgstr_chunk_count > msgid_chunk_count:
-            msgid_chunks += [""] * (msgstr_chunk_count - msgid_chunk_count)
-            msgid_chunk_count = msgstr_chunk_count
-
-        if msgid_chunk_count == 1:
-            entry = polib.POEntry(
-                msgctxt=f"{{{{{key}:}}}}",
-                msgid=msgid_chunks[0],
-                msgstr=msgstr_chunks[0]
-            )
-            po.append(entry)
-        else:
-            for i, (msgid, msgstr) in enumerate(zip(msgid_chunks, msgstr_chunks), start=1):
-                chunked_key = f"{{{{{key}:{i},{msgid_chunk_count}}}}}"
+    # Both files are sorted by key within the esosort memory budget and paired, and the
+    # entries are written as they are built instead of being collected in the POFile
+    english_records = esosort.last_per_key(esosort.sort_records(iter_stripped_tagged_records(english_input_file)))
+    translated_records = []
+    if not isBaseEnglish:
+        translated_records = esosort.last_per_key(esosort.sort_records(iter_stripped_tagged_records(translated_input_file)))
+
+    timer.phase("split and write entries")
+    entry_count = 0
+    with open(output_po, "w", encoding=po.encoding) as po_out:
+        po_out.write(str(po))
+        paired_records = esosort.join_sorted(english_records, translated_records)
+        for (key, msgid_full), translated_record in esoprogress.track(paired_records, "Writing PO entries", unit="keys"):
+            msgstr_full = "" if translated_record is None else translated_record[1]
+
+            msgid_chunks, msgid_chunk_count = split_if_long(msgid_full, locale=locale_english)
+            msgstr_chunks, msgstr_chunk_count = split_if_long(msgstr_full, locale=locale_translated)
+
+            # Pad shorter list with empty strings
+            if msgstr_chunk_count < msgid_chunk_count:
+                msgstr_chunks += [""] * (msgid_chunk_count - msgstr_chunk_count)
+            elif msgstr_chunk_count > msgid_chunk_count:
+                msgid_chunks += [""] * (msgstr_chunk_count - msgid_chunk_count)
+                msgid_chunk_count = msgstr_chunk_count
+
+            if msgid_chunk_count == 1:
                 entry = polib.POEntry(
-                    msgctxt=chunked_key,
-                    msgid=msgid,
-                    msgstr=msgstr
+                    msgctxt=f"{{{{{key}:}}}}",
+                    msgid=msgid_chunks[0],
+                    msgstr=msgstr_chunks[0]
                 )
-                po.append(entry)
+                write_po_entry(po_out, entry)
+                entry_count += 1
+            else:
+                for i, (msgid, msgstr) in enumerate(zip(msgid_chunks, msgstr_chunks), start=1):
+                    chunked_key = f"{{{{{key}:{i},{msgid_chunk_count}}}}}"
+                    entry = polib.POEntry(
+                        msgctxt=chunked_key,
+                        msgid=msgid,
+                        msgstr=msgstr
+                    )
+                    write_po_entry(po_out, entry)
+                    entry_count += 1
 
-    po.save(output_po)
+    timer.stop()
+    esoprofile.count("po entries written", entry_count)
     print(f"PO output written to: {output_po}")
 
 
@@ -2114,19 +2249,16 @@ def merge_esoui_client_files(main_client_file, source_client_file):
     """
     output_filename, _ = generate_output_filename(main_client_file, "merged_esoui")
 
-    # Parse both files into dictionaries
-    main_map = process_eosui_client_file(main_client_file)
-    source_map = process_eosui_client_file(source_client_file)
-
-    # Merge source entries into main
-    for key in main_map:
-        if key in source_map:
-            main_map[key] = source_map[key]
+    # Sort both files by key and pair them, replacing main entries with source entries
+    main_records = esosort.last_per_key(esosort.sort_records(iter_eosui_client_records(main_client_file)))
+    source_records = esosort.last_per_key(esosort.sort_records(iter_eosui_client_records(source_client_file)))
 
     # Write output
     with open(output_filename, "w", encoding="utf-8", newline='\n') as out:
-        for key in sorted(main_map.keys()):
-            lineOut = f"[{key}] = \"{main_map[key]}\""
+        for (key, text), source_record in esosort.join_sorted(main_records, source_records):
+            if source_record is not None:
+                text = source_record[1]
+            lineOut = f"[{key}] = \"{text}\""
             out.write(f"{lineOut}\n")
 
     print(f"Merged ESOUI entries from {source_client_file} into {main_client_file} → {output_filename}")
@@ -2216,6 +2348,8 @@ def compare_tagged_lang_files_for_translation(translated_tagged_text, previous_t
     output_filename, _ = generate_output_filename(translated_tagged_text, "compared_lang_files")
     output_verify_filename, _ = generate_output_filename(translated_tagged_text, "compared_lang_verify")
 
+    timer = esoprofile.PhaseTimer("compare_tagged_lang_files_for_translation")
+    timer.phase("read")
     # Get Previous Translation ------------------------------------------------------
     textTranslatedDict = readTaggedLangFile(translated_tagged_text)
     print("Processed Translated Text")
@@ -2235,9 +2369,10 @@ def compare_tagged_lang_files_for_translation(translated_tagged_text, previous_t
 
     # Compare PTS with Live text, write output -----------------------------------------
     print("Begining Comparison")
+    timer.phase("compare and write")
     with open(output_filename, 'w', encoding="utf8", newline='\n') as out:
         with open(output_verify_filename, 'w', encoding="utf8", newline='\n') as verifyOut:
-            for key in textCurrentUntranslatedDict:
+            for key in esoprogress.track(textCurrentUntranslatedDict, "Comparing", unit="keys"):
                 # Retrieve source and translated text entries by ID
                 translatedText = textTranslatedDict.get(key)
                 current_text = textCurrentUntranslatedDict.get(key)
@@ -2316,6 +2451,8 @@ def compare_tagged_lang_files_for_translation(translated_tagged_text, previous_t
             verifyOut.write(f"Removed obsolete lines: {removed_obsolete}\n")
             verifyOut.write(f"Needs review: {needs_review}\n")
 
+    timer.stop()
+    esoprofile.count("keys compared", len(textCurrentUntranslatedDict))
     print(f"Added English fallback lines: {added_english_fallback}")
     print(f"Removed obsolete lines: {removed_obsolete}")
     print(f"Needs review: {needs_review}")
@@ -2454,6 +2591,7 @@ def create_tagged_lang_text(input_lang_file):
     print(f"Corresponding ID list written to: {id_output_filename}")
 
 
+@cachedArtifact
 def read_tagged_text_to_dict(tagged_text_file):
     """
     Parses a tagged .txt file (e.g. {{sectionId-sectionIndex-stringId:}}text) into
@@ -2579,6 +2717,7 @@ def convert_xliff_to_tagged_lang_text(input_xliff_file):
     Args:
         input_xliff_file (str): Path to the input .xliff file.
     """
+    import xml.etree.ElementTree as ET
     output_filename, _ = generate_output_filename(input_xliff_file, "xliff_file")
     context = ET.iterparse(input_xliff_file, events=("start", "end"))
     _, root = next(context)  # get root element
@@ -2628,6 +2767,7 @@ def convert_tagged_lang_text_to_xliff(original_xliff_file, tagged_text_file):
     Updates the <target> values in the original XLIFF with translations from a tagged text file.
     Forces &quot; in <source> and <target> elements when writing.
     """
+    import xml.etree.ElementTree as ET
     # 1. Read tagged text into dict
     translations = {}
     with open(tagged_text_file, "r", encoding="utf-8") as f:
@@ -2699,6 +2839,7 @@ def convert_xliff_to_esoui(xliff_path):
     Includes *all* entries, regardless of <target> state, so it rebuilds a
     binary-equal ESOUI file.
     """
+    import xml.etree.ElementTree as ET
     output_filename, _ = generate_output_filename(xliff_path, "xliff_to_esoui", file_extension="txt")
 
     context = ET.iterparse(xliff_path, events=("start", "end"))
@@ -2749,6 +2890,7 @@ def convert_esoui_to_xliff(original_xliff_file, esoui_file):
     ESOUI format uses: [KEY] = "Text"
     XLIFF resname uses: KEY (without brackets)
     """
+    import xml.etree.ElementTree as ET
     # 1. Read ESOUI file into dict
     translations = process_eosui_client_file(esoui_file)
 
@@ -2960,6 +3102,8 @@ def diff_tagged_lang_files(official_or_current_tagged_lang_file, candidate_or_pr
             for line in targetList:
                 out.write(line)
 
+    timer = esoprofile.PhaseTimer("diff_tagged_lang_files")
+    timer.phase("read")
     # Get Official/Current Text ----------------------------------------------------------
     textCurrentUntranslatedDict = readTaggedLangFile(official_or_current_tagged_lang_file)
     print("Processed Current/Official Text")
@@ -2973,6 +3117,7 @@ def diff_tagged_lang_files(official_or_current_tagged_lang_file, candidate_or_pr
         print("Processed Source Text")
 
     # Compare official/current with candidate/previous text, write output ----------------
+    timer.phase("compare")
     closeMatchLiveText = []
     closeMatchPtsText = []
     changedText = []
@@ -3052,6 +3197,8 @@ def diff_tagged_lang_files(official_or_current_tagged_lang_file, candidate_or_pr
             lineOut = '{{{{{}:}}}}{}\n'.format(key, previous_text)
             deletedText.append(lineOut)
 
+    timer.phase("write")
+    esoprofile.count("keys compared", len(textCurrentUntranslatedDict))
     print('{}: indexes matched'.format(matchedCount))
     print('{}: both translated and identical'.format(bothTranslatedIdenticalCount))
     print('{}: both untranslated and identical'.format(bothUntranslatedIdenticalCount))
@@ -3095,6 +3242,549 @@ def diff_tagged_lang_files(official_or_current_tagged_lang_file, candidate_or_pr
     # Write current already translated
     output_filename, _ = generate_output_filename(official_or_current_tagged_lang_file, "current_already_translated")
     write_tagged_output_file(output_filename, currentAlreadyTranslatedText)
+    timer.stop()
+
+
+def load_pipeline_recipe(recipe_file):
+    """
+    Read a pipeline recipe and return its steps and its settings.
+
+    JSON is always available. YAML needs PyYAML, TOML needs Python 3.11+ or tomli.
+    The recipe is either a list of steps or a table with a "steps" list and optional
+    settings such as "jobs". A step is either a command line string
+    ("extract_all_sections en.lang") or a table:
+
+        {"function": "extract_all_sections", "args": ["en.lang"], "kwargs": {},
+         "inputs": ["en.lang"], "outputs": ["tagged_text/en_3952276_quest_dialogue_395.txt"]}
+    """
+    extension = os.path.splitext(recipe_file)[1].lower()
+    if extension == ".json":
+        import json
+        with open(recipe_file, 'r', encoding="utf-8") as f:
+            recipe = json.load(f)
+    elif extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"Reading {recipe_file} needs PyYAML (pip install pyyaml)")
+        with open(recipe_file, 'r', encoding="utf-8") as f:
+            recipe = yaml.safe_load(f)
+    elif extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ValueError(f"Reading {recipe_file} needs Python 3.11 or tomli (pip install tomli)")
+        with open(recipe_file, 'rb') as f:
+            recipe = tomllib.load(f)
+    else:
+        raise ValueError(f"Unknown recipe format '{extension}', use .json, .yaml, .yml or .toml")
+
+    if isinstance(recipe, dict):
+        steps = recipe.get("steps")
+        settings = {key: value for key, value in recipe.items() if key != "steps"}
+    else:
+        steps = recipe
+        settings = {}
+    if not isinstance(steps, list):
+        raise ValueError(f"{recipe_file} has no list of steps")
+    return [parse_pipeline_step(step, number) for number, step in enumerate(steps, start=1)], settings
+
+
+def parse_pipeline_step(step, number):
+    """Returns one recipe step as a dict, checking the function name."""
+    import shlex
+    if isinstance(step, str):
+        parts = shlex.split(step)
+        if not parts:
+            raise ValueError(f"Step {number} is empty")
+        step = {"function": parts[0], "args": parts[1:]}
+    if not isinstance(step, dict) or "function" not in step:
+        raise ValueError(f"Step {number} needs a function name")
+
+    functions = {func.__name__: func for func in callable_functions}
+    func = functions.get(step["function"])
+    if func is None or func is run_pipeline:
+        raise ValueError(f"Step {number}: unknown function {step['function']}")
+
+    args = step.get("args", [])
+    if not isinstance(args, list):
+        args = [args]
+    # Steps without declared inputs and outputs keep their place in the recipe order
+    declared = "inputs" in step or "outputs" in step
+    return {
+        "number": number,
+        "function": func.__name__,
+        "args": [convert_cli_arg(arg) for arg in args],
+        "kwargs": {key: convert_cli_arg(value) for key, value in step.get("kwargs", {}).items()},
+        "declared": declared,
+        "inputs": [os.path.abspath(path) for path in step.get("inputs", [])],
+        "outputs": [os.path.abspath(path) for path in step.get("outputs", [])],
+    }
+
+
+def get_pipeline_dependencies(steps):
+    """
+    Returns, for every step, the set of earlier steps it has to wait for.
+
+    A step waits for an earlier one that writes a file it reads, reads a file it writes,
+    or writes the same file. Steps without declared inputs and outputs wait for everything
+    before them, and everything after them waits for them.
+    """
+    dependencies = []
+    for index, step in enumerate(steps):
+        reads = set(step["inputs"])
+        writes = set(step["outputs"])
+        waits_for = set()
+        for earlier_index in range(index):
+            earlier = steps[earlier_index]
+            if not step["declared"] or not earlier["declared"]:
+                waits_for.add(earlier_index)
+            elif reads & set(earlier["outputs"]) or writes & set(earlier["inputs"]) or writes & set(earlier["outputs"]):
+                waits_for.add(earlier_index)
+        dependencies.append(waits_for)
+    return dependencies
+
+
+def pipeline_allows_parallel_steps(dependencies):
+    """True when at least two steps do not depend on each other, directly or through other steps."""
+    ancestors = []
+    for index, waits_for in enumerate(dependencies):
+        step_ancestors = set(waits_for)
+        for earlier_index in waits_for:
+            step_ancestors |= ancestors[earlier_index]
+        if len(step_ancestors) < index:
+            return True
+        ancestors.append(step_ancestors)
+    return False
+
+
+def is_pipeline_step_up_to_date(step):
+    """True when every output of the step exists and is newer than all of its inputs, as make decides."""
+    if not step["outputs"]:
+        return False
+    try:
+        oldest_output = min(os.stat(path).st_mtime_ns for path in step["outputs"])
+        newest_input = max((os.stat(path).st_mtime_ns for path in step["inputs"]), default=0)
+    except OSError:
+        return False
+    return oldest_output >= newest_input
+
+
+def describe_pipeline_step(step, total):
+    return f"[{step['number']}/{total}] {step['function']} {' '.join(str(arg) for arg in step['args'])}".rstrip()
+
+
+def init_pipeline_worker():
+    global artifact_cache
+    artifact_cache = {}
+    # Workers share the parent's terminal; concurrent progress lines would overwrite each other
+    os.environ[esoprogress.PROGRESS_ENV] = "off"
+
+
+def run_pipeline_step(function_name, args, kwargs):
+    """
+    Run one step in a worker process.
+
+    Returns what the step printed, the error text or None, the time it took and the phases
+    and counters the step recorded, so the parent can print it as one block.
+    """
+    import io
+    import time
+    import traceback
+    from contextlib import redirect_stdout
+
+    functions = {func.__name__: func for func in callable_functions}
+    stats_before = esoprofile.get_stats()
+    output = io.StringIO()
+    error = None
+    start = time.perf_counter()
+    with redirect_stdout(output):
+        try:
+            functions[function_name](*args, **kwargs)
+        except Exception as e:
+            traceback.print_exc(file=output)
+            error = f"{type(e).__name__}: {e}"
+    return output.getvalue(), error, time.perf_counter() - start, esoprofile.diff_stats(stats_before, esoprofile.get_stats())
+
+
+@mainFunction
+def run_pipeline(recipe_file, jobs=None, force=False):
+    """
+    Run the steps of a recipe file, independent steps side by side.
+
+    Every step is a callable function of this script with its arguments, as it would be
+    given on the command line. Steps may declare the files they read ("inputs") and write
+    ("outputs"); a step starts once the steps producing its inputs are done, and a step
+    whose outputs are all newer than its inputs is skipped. Steps without declarations run
+    in recipe order.
+
+    By default everything runs in this process, so the .lang, tagged text and client .str
+    files the steps read are parsed once and shared by all steps until a step changes them.
+    With more than one job, and steps that declare enough inputs and outputs to run side by
+    side, the steps run in a pool of worker processes instead; each worker keeps its own
+    parsed files and each step's messages are printed together when it finishes.
+
+    Args:
+        recipe_file (str): Path to a .json, .yaml/.yml or .toml recipe.
+        jobs (int, optional): Worker processes. Defaults to the recipe's "jobs" setting or 1.
+        force (bool, optional): Run every step even when its outputs are up to date. Defaults to False.
+
+    Example recipe.json:
+        {"jobs": 4, "steps": [
+            {"function": "create_tagged_lang_text", "args": ["en.lang"],
+             "inputs": ["en.lang"], "outputs": ["en_tagged_lang_text.txt", "en_tagged_lang_ids.txt"]},
+            {"function": "create_tagged_lang_text", "args": ["ko.lang"],
+             "inputs": ["ko.lang"], "outputs": ["ko_tagged_lang_text.txt", "ko_tagged_lang_ids.txt"]},
+            "combine_client_files en_client.str en_pregame.str"
+        ]}
+    """
+    global artifact_cache
+    import time
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    steps, settings = load_pipeline_recipe(recipe_file)
+    if jobs is None:
+        jobs = settings.get("jobs") or 1
+    jobs = max(1, min(int(jobs), len(steps) or 1))
+    dependencies = get_pipeline_dependencies(steps)
+    if jobs > 1 and not pipeline_allows_parallel_steps(dependencies):
+        # Steps without declarations run one after another anyway; keep them in this process
+        print(f"No steps can run side by side, running in this process instead of {jobs} workers")
+        jobs = 1
+    total = len(steps)
+
+    pending = list(range(total))
+    finished = set()
+    failed = []
+    skipped = 0
+    ran = 0
+    stats_before = esoprofile.get_stats()
+    pipeline_start = time.perf_counter()
+
+    def next_ready_step():
+        """Returns the first pending step whose dependencies are done, skipping up to date ones on the way."""
+        nonlocal skipped
+        while True:
+            for index in pending:
+                if dependencies[index] <= finished:
+                    break
+            else:
+                return None
+            pending.remove(index)
+            if force or not is_pipeline_step_up_to_date(steps[index]):
+                return index
+            print(f"{describe_pipeline_step(steps[index], total)}: up to date, skipped")
+            finished.add(index)
+            skipped += 1
+
+    if jobs == 1:
+        artifact_cache = {}
+        try:
+            index = next_ready_step()
+            while index is not None:
+                step = steps[index]
+                print(describe_pipeline_step(step, total))
+                step_start = time.perf_counter()
+                try:
+                    globals()[step["function"]](*step["args"], **step["kwargs"])
+                except Exception as e:
+                    print(f"Step {step['number']} ({step['function']}) failed: {e}")
+                    print("Pipeline stopped.")
+                    raise
+                print(f"{describe_pipeline_step(step, total)} done in {time.perf_counter() - step_start:.2f}s")
+                finished.add(index)
+                ran += 1
+                index = next_ready_step()
+        finally:
+            artifact_cache = None
+    else:
+        print(f"Running {total} steps with {jobs} worker processes")
+        running = {}
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_pipeline_worker) as executor:
+            while True:
+                while not failed and len(running) < jobs:
+                    index = next_ready_step()
+                    if index is None:
+                        break
+                    step = steps[index]
+                    print(f"{describe_pipeline_step(step, total)} started")
+                    future = executor.submit(run_pipeline_step, step["function"], step["args"], step["kwargs"])
+                    running[future] = index
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    step = steps[index]
+                    output, error, elapsed, step_stats = future.result()
+                    if output:
+                        print(output, end="" if output.endswith("\n") else "\n")
+                    esoprofile.merge_stats(step_stats)
+                    if error:
+                        print(f"Step {step['number']} ({step['function']}) failed: {error}")
+                        failed.append(step)
+                    else:
+                        print(f"{describe_pipeline_step(step, total)} done in {elapsed:.2f}s")
+                        finished.add(index)
+                        ran += 1
+
+    cache_counts = esoprofile.diff_stats(stats_before, esoprofile.get_stats())["counters"]
+    print(f"Pipeline finished in {time.perf_counter() - pipeline_start:.2f}s: {ran} steps run, {skipped} up to date "
+          f"(parsed files reused {cache_counts.get('artifact cache hits', 0)} times, "
+          f"parsed {cache_counts.get('artifact cache misses', 0)} times)")
+    if failed:
+        print(f"{total - ran - skipped} steps did not complete.")
+        raise RuntimeError(f"Pipeline stopped, step {failed[0]['number']} ({failed[0]['function']}) failed")
+
+
+def read_text_map(filename):
+    """
+    Returns {key: text} for a .lang file, a client .str file or a tagged text file.
+
+    .lang keys are sectionId-sectionIndex-stringIndex like the keys of a tagged text file,
+    .str keys are the client string names.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".lang":
+        fileIndexes, _ = readLangFile.__wrapped__(filename)
+        return {
+            f"{entry['sectionId']}-{entry['sectionIndex']}-{entry['stringIndex']}": entry['string'].decode("utf-8", errors="replace")
+            for index, entry in fileIndexes.items() if isinstance(index, int)
+        }
+    if extension == ".str":
+        return process_eosui_client_file.__wrapped__(filename)
+    return readTaggedLangFile.__wrapped__(filename)
+
+
+def get_required_param(params, name):
+    value = params.get(name)
+    if value is None or value == "":
+        raise ValueError(f"Missing parameter '{name}'")
+    return value
+
+
+def serve_lookup(params):
+    filename = get_required_param(params, "file")
+    key = get_required_param(params, "key")
+    text = get_cached_artifact(read_text_map, filename).get(key)
+    return {"file": filename, "key": key, "found": text is not None, "text": text}
+
+
+def serve_translated(params):
+    result = serve_lookup(params)
+    result["translated"] = isTranslatedText(result["text"])
+    return result
+
+
+def serve_diff(params):
+    old_file = get_required_param(params, "old")
+    new_file = get_required_param(params, "new")
+    key = get_required_param(params, "key")
+    old_text = get_cached_artifact(read_text_map, old_file).get(key)
+    new_text = get_cached_artifact(read_text_map, new_file).get(key)
+    return {
+        "key": key,
+        "old": old_text,
+        "new": new_text,
+        "added": old_text is None and new_text is not None,
+        "deleted": old_text is not None and new_text is None,
+        "identical": old_text == new_text,
+        "similar": bool(isSimilarText(new_text, old_text)),
+    }
+
+
+def serve_convert(params):
+    import io
+    text = get_required_param(params, "text")
+    direction = params.get("direction") or "korean_to_eso"
+    converters = {"korean_to_eso": convert_korean_to_eso_stream, "eso_to_korean": convert_eso_to_korean_stream}
+    if direction not in converters:
+        raise ValueError(f"Unknown direction '{direction}', use korean_to_eso or eso_to_korean")
+    out = io.StringIO()
+    converters[direction](io.BytesIO(text.encode("utf-8")), out)
+    return {"direction": direction, "text": out.getvalue()}
+
+
+def serve_call(params):
+    """Runs a callable function like the command line would and returns what it printed."""
+    import io
+    import traceback
+    from contextlib import redirect_stdout
+
+    function_name = get_required_param(params, "function")
+    functions = {func.__name__: func for func in callable_functions if func not in (serve, run_pipeline)}
+    if function_name not in functions:
+        raise ValueError(f"Unknown function: {function_name}")
+    args = params.get("args", [])
+    if not isinstance(args, list):
+        args = [args]
+    kwargs = params.get("kwargs", {})
+
+    output = io.StringIO()
+    error = None
+    with redirect_stdout(output):
+        try:
+            functions[function_name](*[convert_cli_arg(arg) for arg in args],
+                                     **{key: convert_cli_arg(value) for key, value in kwargs.items()})
+        except Exception as e:
+            traceback.print_exc(file=output)
+            error = f"{type(e).__name__}: {e}"
+    return {"function": function_name, "output": output.getvalue(), "error": error}
+
+
+def serve_status(params):
+    return {
+        "files": sorted({path for _, path in artifact_cache}),
+        "hits": esoprofile.counters.get("artifact cache hits", 0),
+        "misses": esoprofile.counters.get("artifact cache misses", 0),
+    }
+
+
+SERVE_ENDPOINTS = {
+    "/lookup": serve_lookup,
+    "/translated": serve_translated,
+    "/diff": serve_diff,
+    "/convert": serve_convert,
+    "/call": serve_call,
+    "/status": serve_status,
+}
+
+
+@mainFunction
+def serve(port=8765, host="127.0.0.1", verbose=False, allow_call=False):
+    """
+    Answer lookups and run functions over HTTP, keeping the parsed files in memory.
+
+    Files are read on first use and kept until their size or modification time changes, so
+    edits on disk are picked up by the next request. Requests are GET with query parameters
+    or POST with a JSON object, and every answer is JSON. Relative paths are resolved from
+    the folder the server was started in.
+
+    The endpoints read any file the user can read, so only listen on 127.0.0.1. Requests
+    from web pages are refused: the Host header must name 127.0.0.1, localhost or the bound
+    address with the server's port, and requests carrying an Origin header are rejected.
+    /call runs functions that write files; it is off unless allow_call is True and only
+    accepts POST with Content-Type: application/json.
+
+    Endpoints:
+        /lookup?file=en.lang&key=3952276-0-1           Text of a key in a .lang, .str or tagged text file
+        /translated?file=kr_tagged.txt&key=...         Same, plus whether the text looks translated
+        /diff?old=en_prv.lang&new=en_cur.lang&key=...  Compare one key between two files
+        /convert?text=...&direction=korean_to_eso      korean_to_eso or eso_to_korean on a string
+        /call  POST {"function": "create_tagged_lang_text", "args": ["en.lang"]}   (allow_call only)
+        /status                                        Files held in memory and cache counters
+
+    Args:
+        port (int, optional): Port to listen on. Defaults to 8765.
+        host (str, optional): Address to bind. Defaults to 127.0.0.1.
+        verbose (bool, optional): Log every request. Defaults to False.
+        allow_call (bool, optional): Enable /call. Defaults to False.
+
+    Example:
+        curl "http://127.0.0.1:8765/lookup?file=en.lang&key=3952276-0-1"
+        python esolang.py serve 8765 127.0.0.1 False True
+        curl -X POST -H "Content-Type: application/json" -d '{"function": "korean_to_eso", "args": ["ko.txt"]}' http://127.0.0.1:8765/call
+    """
+    global artifact_cache
+    import json
+    import threading
+    import traceback
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qs
+
+    # The functions share module level dictionaries, so one request does its work at a time
+    serve_lock = threading.Lock()
+    artifact_cache = {}
+
+    endpoints = dict(SERVE_ENDPOINTS)
+    if not allow_call:
+        del endpoints["/call"]
+
+    class EsolangRequestHandler(BaseHTTPRequestHandler):
+        def get_request_error(self):
+            """Returns (status, message) for a request from outside this machine's command line tools, or None."""
+            allowed_hosts = {f"{name}:{server.server_address[1]}" for name in ("127.0.0.1", "localhost", host)}
+            if self.headers.get("Host", "").lower() not in allowed_hosts:
+                return 403, "Host header does not name this server"
+            # Browsers send Origin on cross-site and POST requests; command line clients do not
+            if "Origin" in self.headers:
+                return 403, "Requests from web pages are not accepted"
+            path = urlsplit(self.path).path
+            if path == "/call" and path in endpoints:
+                content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if self.command != "POST" or content_type != "application/json":
+                    return 405, "/call only accepts POST with Content-Type: application/json"
+            return None
+
+        def handle_request(self, params):
+            url = urlsplit(self.path)
+            endpoint = endpoints.get(url.path)
+            if endpoint is None:
+                self.send_json(404, {"error": f"Unknown endpoint {url.path}", "endpoints": sorted(endpoints)})
+                return
+            params.update({name: values[-1] for name, values in parse_qs(url.query).items()})
+            try:
+                with serve_lock:
+                    result = endpoint(params)
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+            except OSError as e:
+                self.send_json(404, {"error": str(e)})
+            except Exception as e:
+                traceback.print_exc()
+                self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            else:
+                self.send_json(200, result)
+
+        def do_GET(self):
+            request_error = self.get_request_error()
+            if request_error:
+                self.send_json(request_error[0], {"error": request_error[1]})
+                return
+            self.handle_request({})
+
+        def do_POST(self):
+            request_error = self.get_request_error()
+            if request_error:
+                self.send_json(request_error[0], {"error": request_error[1]})
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                self.send_json(400, {"error": f"Request body is not JSON: {e}"})
+                return
+            if not isinstance(params, dict):
+                self.send_json(400, {"error": "Request body must be a JSON object"})
+                return
+            self.handle_request(params)
+
+        def send_json(self, status, result):
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+
+    server = ThreadingHTTPServer((host, int(port)), EsolangRequestHandler)
+    print(f"Serving on http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    if allow_call:
+        print("/call is enabled: clients on this machine can run any command")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping server.")
+    finally:
+        server.server_close()
+        artifact_cache = None
 
 
 # =============================================================================
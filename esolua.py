@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+import re
+
+"""
+Lua table literal reader for SavedVariables and data dumps.
+
+decode(text) is a drop-in replacement for slpp.decode and returns the same values:
+tables become dicts, or lists when their keys are exactly 0..n-1 (slpp numbers implicit
+entries from 0), strings keep escape sequences other than an escaped quote verbatim,
+and true/false/nil map to True/False/None. Instead of slpp's one-character-at-a-time
+scanner it jumps between tokens with compiled regular expressions, which is what makes
+multi-megabyte files like LibQuestHelper_SavedVariables practical.
+
+Usage: import esolua as lua; data = lua.decode(text)
+"""
+
+ERRORS = {
+    'unexp_end_string': 'Unexpected end of string while parsing Lua string.',
+    'unexp_end_table': 'Unexpected end of table while parsing Lua string.',
+    'mfnumber_minus': 'Malformed number (no digits after initial minus).',
+    'mfnumber_dec_point': 'Malformed number (no digits after decimal point).',
+    'mfnumber_sci': 'Malformed number (bad scientific format).',
+}
+
+LUA_WORDS = {'true': True, 'false': False, 'nil': None}
+
+# Whitespace, -- line comments and --[[ block comments ]] between tokens
+reWhite = re.compile(r'(?:\s+|--(?:\[\[.*?(?:\]\]|\Z)|[^\n]*))*', re.DOTALL)
+reDoubleQuoted = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"', re.DOTALL)
+reSingleQuoted = re.compile(r"'([^'\\]*(?:\\.[^'\\]*)*)'", re.DOTALL)
+reEscape = re.compile(r'\\(.)', re.DOTALL)
+reDigits = re.compile(r'\d*')
+reHexDigits = re.compile(r'[0-9A-Fa-f]*')
+reWordTail = re.compile(r'\w*')
+# Fast path for the common "key = value," entry: [int], ["string"] or name keys with a plain
+# string, decimal number, boolean or nested table value. Anything else (escapes, comments, hex, exponents,
+# true/false/nil prefixed names) fails the pattern and goes through LuaReader.value.
+FAST_KEY = (
+    r'(?:\[(-?(?:0|[1-9][0-9]*))\]|\["([^"\\]*)"\]|((?!true|false|nil)[A-Za-z_][A-Za-z0-9_]*))'
+    r'[ \t\r\n]*=[ \t\r\n]*'
+)
+FAST_SCALAR = r'(?:"([^"\\]*)"|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?)(?![0-9.xXeE])|(true|false)(?!\w))'
+reFastEntry = re.compile(r'[ \t\r\n]*' + FAST_KEY + r'(?:' + FAST_SCALAR + r'(?:[ \t\r\n]*,)?[ \t\r\n]*|(\{))?')
+
+# Everything inside a table that is not a brace: text, strings and comments (which may contain
+# braces), so skipping a subtree costs one match per nested table instead of building it
+reSkipContent = re.compile(
+    r'(?:[^{}"\'\[-]+|"[^"\\]*(?:\\.[^"\\]*)*"|\'[^\'\\]*(?:\\.[^\'\\]*)*\''
+    r'|\[\[.*?\]\]|\[|--\[\[.*?(?:\]\]|\Z)|--[^\n]*|-)*',
+    re.DOTALL
+)
+
+
+class ParseError(Exception):
+    pass
+
+
+def unescape(content, quote):
+    """Only an escaped quote is unescaped; any other backslash pair is kept as written."""
+    if '\\' not in content:
+        return content
+    return reEscape.sub(lambda m: quote if m.group(1) == quote else m.group(0), content)
+
+
+def table_to_list(table):
+    """Returns table as a list when its keys are exactly the integers 0..n-1, otherwise unchanged."""
+    if 0 not in table:
+        return table
+    keys = list(table)
+    for key in keys:
+        if type(key) is not int and isinstance(key, (str, float, bool, tuple)):
+            return table
+    sorted_keys = sorted(keys)
+    if not sorted_keys or sorted_keys[0] != 0 or sorted_keys[-1] != len(sorted_keys) - 1:
+        return table
+    if keys == sorted_keys:
+        return list(table.values())
+    values = []
+    for key in keys:
+        values.insert(key, table[key])
+    return values
+
+
+class LuaReader:
+    """Recursive descent over text; every method takes a position and returns (value, next position)."""
+
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+
+    def skip(self, pos):
+        return reWhite.match(self.text, pos).end()
+
+    def value(self, pos):
+        text = self.text
+        pos = self.skip(pos)
+        if pos >= self.length:
+            return None, pos
+        ch = text[pos]
+        if ch == '{':
+            return self.table(pos + 1)
+        if ch == '[':
+            pos += 1
+            ch = text[pos:pos + 1]
+        if ch == '"' or ch == "'":
+            return self.quoted_string(pos, ch)
+        if ch == '[':
+            return self.long_string(pos)
+        if ch.isdigit() or ch == '-':
+            return self.number(pos)
+        return self.word(pos)
+
+    def quoted_string(self, pos, quote):
+        match = (reDoubleQuoted if quote == '"' else reSingleQuoted).match(self.text, pos)
+        if match is None:
+            raise ParseError(ERRORS['unexp_end_string'])
+        return unescape(match.group(1), quote), match.end()
+
+    def long_string(self, pos):
+        # pos is on the second '[' of '[['; like slpp, a leading newline is kept
+        end = self.text.find(']]', pos + 1)
+        if end == -1:
+            raise ParseError(ERRORS['unexp_end_string'])
+        return self.text[pos + 1:end], end + 2
+
+    def number(self, pos):
+        text = self.text
+        start = pos
+        if text[pos] == '-':
+            pos += 1
+            if not text[pos:pos + 1].isdigit():
+                print(ERRORS['mfnumber_minus'])
+                return 0, pos
+        pos = reDigits.match(text, pos).end()
+        if text[start:pos] == '0' and text[pos:pos + 1] in ('x', 'X'):
+            pos = reHexDigits.match(text, pos + 1).end()
+        else:
+            if text[pos:pos + 1] == '.':
+                pos += 1
+                if not text[pos:pos + 1].isdigit():
+                    print(ERRORS['mfnumber_dec_point'])
+                    return 0, pos
+                pos = reDigits.match(text, pos).end()
+            if text[pos:pos + 1] in ('e', 'E'):
+                pos += 1
+                if text[pos:pos + 1] not in ('+', '-'):
+                    print(ERRORS['mfnumber_sci'])
+                    return 0, pos
+                pos += 1
+                if not text[pos:pos + 1].isdigit():
+                    print(ERRORS['mfnumber_sci'])
+                    return 0, pos
+                pos = reDigits.match(text, pos).end()
+        number = text[start:pos]
+        try:
+            return int(number, 0), pos
+        except ValueError:
+            pass
+        return float(number), pos
+
+    def word(self, pos):
+        text = self.text
+        first = text[pos] if text[pos] != '\n' else ''
+        end = reWordTail.match(text, pos + 1).end()
+        word = first + text[pos + 1:end]
+        # slpp stops reading as soon as the word so far is true/false/nil
+        for keyword in LUA_WORDS:
+            if word.startswith(keyword) and len(keyword) >= len(first):
+                return LUA_WORDS[keyword], pos + 1 + len(keyword) - len(first)
+        return word, end
+
+    def skip_table(self, pos):
+        """Returns the position after the '}' closing the table whose '{' is at pos - 1."""
+        text = self.text
+        depth = 1
+        while True:
+            pos = reSkipContent.match(text, pos).end()
+            if pos >= self.length:
+                raise ParseError(ERRORS['unexp_end_table'])
+            ch = text[pos]
+            if ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            else:
+                # Only an unterminated string stops reSkipContent elsewhere
+                raise ParseError(ERRORS['unexp_end_string'])
+            pos += 1
+
+    def skip_value(self, pos):
+        pos = self.skip(pos)
+        if self.text[pos:pos + 1] == '{':
+            return self.skip_table(pos + 1)
+        return self.value(pos)[1]
+
+    def entries(self, pos, wanted, decode=True):
+        """
+        Walks the table whose '{' is at pos - 1 like table() and yields (key, value) for each
+        entry whose key passes wanted(key); all other values are skipped without being built.
+        With decode=False the start position of the value is yielded instead of the value and
+        the value is skipped when the generator resumes. Implicit entries use their 0-based index.
+        """
+        text = self.text
+        length = self.length
+        index = 0
+        pending = None
+        pending_start = pos
+        while pos < length:
+            pos = self.skip(pos)
+            if pos >= length:
+                break
+            ch = text[pos]
+            if ch == '}':
+                if pending is not None and wanted(index):
+                    yield index, pending if decode else pending_start
+                return
+            if ch == '{':
+                if wanted(index) and decode:
+                    value, pos = self.table(pos + 1)
+                    yield index, value
+                else:
+                    if wanted(index):
+                        yield index, pos
+                    pos = self.skip_table(pos + 1)
+                index += 1
+                continue
+            if ch == ',':
+                pos += 1
+                continue
+            pending_start = pos
+            pending, pos = self.value(pos)
+            if text[pos:pos + 1] == ']':
+                pos += 1
+            pos = self.skip(pos)
+            ch = text[pos:pos + 1]
+            if ch == '=':
+                if wanted(pending) and decode:
+                    value, pos = self.value(pos + 1)
+                    yield pending, value
+                else:
+                    if wanted(pending):
+                        yield pending, self.skip(pos + 1)
+                    pos = self.skip_value(pos + 1)
+                index += 1
+                pending = None
+            elif ch == ',':
+                pos += 1
+                if wanted(index):
+                    yield index, pending if decode else pending_start
+                index += 1
+                pending = None
+        raise ParseError(ERRORS['unexp_end_table'])
+
+    def table(self, pos):
+        text = self.text
+        length = self.length
+        table = {}
+        pending = None
+        index = 0
+        pos = self.skip(pos)
+        if text[pos:pos + 1] == '}':
+            return table, pos + 1
+        # A scanner continues from the end of its previous match, so a run of simple entries
+        # costs one call each; it is restarted whenever a nested table or the slow path moves pos
+        fast_entry = reFastEntry.scanner(text, pos).match
+        while pos < length:
+            match = fast_entry()
+            if match is not None:
+                int_key, string_key, name_key, string_value, number_value, bool_value, open_table = match.groups()
+                if int_key is not None:
+                    key = int(int_key)
+                elif string_key is not None:
+                    key = string_key
+                else:
+                    key = name_key
+                pos = match.end()
+                value_group = match.lastindex
+                if value_group == 4:
+                    table[key] = string_value
+                elif value_group == 5:
+                    table[key] = float(number_value) if '.' in number_value else int(number_value)
+                elif value_group == 6:
+                    table[key] = bool_value == 'true'
+                elif value_group == 7:
+                    table[key], pos = self.table(pos)
+                    fast_entry = reFastEntry.scanner(text, pos).match
+                else:
+                    table[key], pos = self.value(pos)
+                    fast_entry = reFastEntry.scanner(text, pos).match
+                index += 1
+                pending = None
+                continue
+            pos = self.skip(pos)
+            if pos >= length:
+                break
+            ch = text[pos]
+            if ch == '}':
+                if pending is not None:
+                    table[index] = pending
+                return table_to_list(table), pos + 1
+            if ch == '{':
+                table[index], pos = self.table(pos + 1)
+                index += 1
+            elif ch == ',':
+                pos += 1
+            else:
+                pending, pos = self.value(pos)
+                if text[pos:pos + 1] == ']':
+                    pos += 1
+                pos = self.skip(pos)
+                ch = text[pos:pos + 1]
+                if ch == '=':
+                    table[pending], pos = self.value(pos + 1)
+                    index += 1
+                    pending = None
+                elif ch == ',':
+                    pos += 1
+                    table[index] = pending
+                    index += 1
+                    pending = None
+            fast_entry = reFastEntry.scanner(text, pos).match
+        raise ParseError(ERRORS['unexp_end_table'])
+
+
+def decode(text):
+    """Parse the first Lua value in text; returns None for empty or non-string input."""
+    if not text or not isinstance(text, str):
+        return None
+    value, _ = LuaReader(text).value(0)
+    return value
+
+
+def iter_table_entries(text, path=(), pos=0):
+    """
+    Stream the entries of one nested table without decoding the rest of text.
+
+    Starting from the table at pos, follows path (a sequence of keys) while skipping every
+    sibling value, then yields (key, value) for each entry of the table it reaches, decoding
+    one value at a time. Values match what decode would return for the same entry; a key that
+    appears twice is yielded twice. Raises KeyError for a missing key in path and ParseError
+    when a value on the path is not a table.
+    """
+    reader = LuaReader(text)
+    pos = reader.skip(pos)
+    for key in path:
+        if text[pos:pos + 1] != '{':
+            raise ParseError(f'Expected a Lua table before key {key!r}.')
+        # Like decode, the last occurrence of a repeated key wins
+        value_pos = None
+        for _, value_pos in reader.entries(pos + 1, lambda found: found == key, decode=False):
+            pass
+        if value_pos is None:
+            raise KeyError(key)
+        pos = value_pos
+    if text[pos:pos + 1] != '{':
+        raise ParseError('Expected a Lua table.')
+    yield from reader.entries(pos + 1, lambda found: True)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+
+"""
+Opt-in instrumentation for the callable functions of esolang, esotools, esoutils and esoKRFontPatcher.
+
+Every script wraps its callable functions with profiled() through its mainFunction decorator.
+Nothing is measured unless profiling is switched on with --profile on the command line or the
+ESOLANG_PROFILE environment variable. The value is a comma separated list:
+
+    on        wall time, CPU time, peak RSS and bytes read/written per command
+    memory    also trace Python allocations with tracemalloc (slows the command down)
+    cprofile  also write a cProfile dump per command, readable with pstats or snakeviz
+
+Each command appends one JSON line to esolang_metrics.jsonl in the current folder, or to
+the file named by ESOLANG_METRICS_FILE. cProfile dumps are written next to it.
+
+Long commands also report named phases (PhaseTimer) and counters (count) while they run. Both
+are cheap enough to stay on all the time; --stats prints them as a table when the command
+finishes, and profiled commands add them to their metrics line.
+
+Usage: python esolang.py --profile extract_all_sections en.lang
+       ESOLANG_PROFILE=on,cprofile python esotools.py build_lqd_mapindex_files LibQuestHelper.lua
+       python esolang.py --stats diff_tagged_lang_files en_cur_tagged.txt en_prv_tagged.txt
+"""
+
+PROFILE_ENV = "ESOLANG_PROFILE"
+METRICS_FILE_ENV = "ESOLANG_METRICS_FILE"
+DEFAULT_METRICS_FILE = "esolang_metrics.jsonl"
+PROFILE_OPTIONS = ("on", "memory", "cprofile")
+
+
+def parse_profile_options(value):
+    """Returns the set of enabled options for an ESOLANG_PROFILE / --profile value."""
+    if not value or value.strip().lower() in ("0", "off", "false", "no", "none"):
+        return set()
+    options = {"on"}
+    for option in value.lower().split(","):
+        option = option.strip()
+        if option in ("1", "true", "yes", ""):
+            continue
+        if option not in PROFILE_OPTIONS:
+            print(f"Warning: Unknown profile option '{option}', expected one of {', '.join(PROFILE_OPTIONS)}")
+            continue
+        options.add(option)
+    return options
+
+
+profile_options = parse_profile_options(os.environ.get(PROFILE_ENV))
+# Nesting level of profiled calls; run_pipeline and serve call other commands. A forked worker
+# process starts with its parent's level, so the level is kept per process id.
+call_depth = 0
+call_depth_pid = os.getpid()
+
+
+# Seconds and number of runs per phase name, and counter values, for this process
+phase_totals = {}
+phase_runs = {}
+counters = {}
+
+
+class PhaseTimer:
+    """
+    Stopwatch that splits a command into named phases.
+
+    phase() ends the running phase and starts the next one, so a function only needs one line
+    where each phase begins. Phases are recorded as "<owner>: <name>".
+
+    Usage:
+        timer = esoprofile.PhaseTimer("diff_tagged_lang_files")
+        timer.phase("read")
+        ...
+        timer.phase("compare")
+        ...
+        timer.stop()
+    """
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.name = None
+        self.start = 0.0
+
+    def phase(self, name):
+        self.stop()
+        self.name = f"{self.owner}: {name}"
+        self.start = time.perf_counter()
+
+    def stop(self):
+        if self.name is None:
+            return
+        phase_totals[self.name] = phase_totals.get(self.name, 0.0) + time.perf_counter() - self.start
+        phase_runs[self.name] = phase_runs.get(self.name, 0) + 1
+        self.name = None
+
+
+def count(name, amount=1):
+    counters[name] = counters.get(name, 0) + amount
+
+
+def get_stats():
+    """Returns a copy of the phases and counters recorded so far, for merging or comparing later."""
+    return {
+        "phases": {name: [phase_totals[name], phase_runs[name]] for name in phase_totals},
+        "counters": dict(counters),
+    }
+
+
+def diff_stats(before, after):
+    """Returns what was recorded between two get_stats() snapshots."""
+    phases = {}
+    for name, (seconds, runs) in after["phases"].items():
+        old_seconds, old_runs = before["phases"].get(name, [0.0, 0])
+        if runs != old_runs:
+            phases[name] = [seconds - old_seconds, runs - old_runs]
+    changed = {name: value - before["counters"].get(name, 0) for name, value in after["counters"].items()
+               if value != before["counters"].get(name, 0)}
+    return {"phases": phases, "counters": changed}
+
+
+def merge_stats(stats):
+    """Adds phases and counters recorded elsewhere, such as in a worker process."""
+    for name, (seconds, runs) in stats["phases"].items():
+        phase_totals[name] = phase_totals.get(name, 0.0) + seconds
+        phase_runs[name] = phase_runs.get(name, 0) + runs
+    for name, value in stats["counters"].items():
+        count(name, value)
+
+
+def print_stats():
+    if not phase_totals and not counters:
+        print("No phases or counters were recorded.")
+        return
+    if phase_totals:
+        width = max(len(name) for name in phase_totals)
+        print(f"\n{'Phase':<{width}}  {'Runs':>6}  {'Seconds':>9}")
+        for name in phase_totals:
+            print(f"{name:<{width}}  {phase_runs[name]:>6}  {phase_totals[name]:>9.3f}")
+    if counters:
+        width = max(len(name) for name in counters)
+        print(f"\n{'Counter':<{width}}  {'Count':>10}")
+        for name in sorted(counters):
+            print(f"{name:<{width}}  {counters[name]:>10}")
+
+
+def enable(value="on"):
+    """Switches profiling on for this process and for worker processes it starts."""
+    global profile_options
+    profile_options = parse_profile_options(value)
+    os.environ[PROFILE_ENV] = ",".join(sorted(profile_options))
+
+
+def is_enabled():
+    return bool(profile_options)
+
+
+def get_metrics_file():
+    return os.environ.get(METRICS_FILE_ENV) or DEFAULT_METRICS_FILE
+
+
+def read_io_counters():
+    """Returns (bytes read, bytes written) by this process so far, or (None, None) if the OS does not tell."""
+    if os.path.exists("/proc/self/io"):
+        counters = {}
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                counters[name] = int(value)
+        # rchar/wchar count every read and write call, including ones served from the page cache
+        return counters.get("rchar"), counters.get("wchar")
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class IO_COUNTERS(ctypes.Structure):
+            _fields_ = [(name, ctypes.c_ulonglong) for name in (
+                "ReadOperationCount", "WriteOperationCount", "OtherOperationCount",
+                "ReadTransferCount", "WriteTransferCount", "OtherTransferCount")]
+
+        counters = IO_COUNTERS()
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if kernel32.GetProcessIoCounters(kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+            return counters.ReadTransferCount, counters.WriteTransferCount
+    return None, None
+
+
+def read_peak_rss_mb():
+    """Returns the highest resident set size of this process so far in MB, or None where resource is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def describe_args(args, kwargs):
+    described = [str(arg) for arg in args]
+    described.extend(f"{key}={value}" for key, value in kwargs.items())
+    return described
+
+
+def write_metrics(record):
+    import json
+    with open(get_metrics_file(), "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def profiled(func):
+    """Wraps a callable function so that, when profiling is on, each call is measured and recorded."""
+    from functools import wraps
+    script = os.path.splitext(os.path.basename(func.__globals__.get("__file__") or func.__module__))[0]
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        global call_depth, call_depth_pid
+        if not profile_options:
+            return func(*args, **kwargs)
+        if call_depth_pid != os.getpid():
+            call_depth = 0
+            call_depth_pid = os.getpid()
+
+        import datetime
+        trace_memory = "memory" in profile_options
+        profiler = None
+        # cProfile cannot nest, so only the outermost command is profiled
+        if "cprofile" in profile_options and call_depth == 0:
+            import cProfile
+            profiler = cProfile.Profile()
+        if trace_memory:
+            import tracemalloc
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            elif hasattr(tracemalloc, "reset_peak"):
+                # Python 3.9+; on 3.8 a nested command reports the peak of its caller
+                tracemalloc.reset_peak()
+
+        record = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "script": script,
+            "command": func.__name__,
+            "args": describe_args(args, kwargs),
+            "pid": os.getpid(),
+            "depth": call_depth,
+        }
+        stats_before = get_stats()
+        read_before, written_before = read_io_counters()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        call_depth += 1
+        status = "ok"
+        try:
+            if profiler is not None:
+                return profiler.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        except BaseException as e:
+            status = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            call_depth -= 1
+            record["status"] = status
+            record["wall_s"] = round(time.perf_counter() - wall_start, 4)
+            record["cpu_s"] = round(time.process_time() - cpu_start, 4)
+            record["peak_rss_mb"] = read_peak_rss_mb()
+            if trace_memory:
+                record["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+                if started_tracing:
+                    tracemalloc.stop()
+            read_after, written_after = read_io_counters()
+            record["read_bytes"] = None if read_before is None else read_after - read_before
+            record["written_bytes"] = None if written_before is None else written_after - written_before
+            stats = diff_stats(stats_before, get_stats())
+            record["phases"] = {name: [round(seconds, 4), runs] for name, (seconds, runs) in stats["phases"].items()}
+            record["counters"] = stats["counters"]
+            if profiler is not None:
+                stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                profile_file = os.path.join(os.path.dirname(os.path.abspath(get_metrics_file())),
+                                            f"{script}_{func.__name__}_{stamp}_{os.getpid()}.prof")
+                profiler.dump_stats(profile_file)
+                record["cprofile"] = profile_file
+            write_metrics(record)
+
+    return wrapper
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+
+"""
+Progress lines for the long running commands of esolang and esotools.
+
+A Progress redraws one status line on stderr, at most a few times per second, showing the
+items done, items per second and, when the total is known, the percentage and an ETA. It is
+only drawn when stderr is a terminal, so redirected output and pipeline workers stay quiet
+and the normal messages on stdout are unchanged. ESOLANG_PROGRESS=off hides it everywhere,
+ESOLANG_PROGRESS=on draws it even when stderr is not a terminal.
+
+update() only adds to a counter until the next redraw is due, and the clock is read once per
+batch of updates sized from the measured rate, so a progress line costs next to nothing even
+in loops over hundreds of thousands of entries.
+
+Usage:
+    for key in esoprogress.track(sorted(english_map), "Building PO entries", unit="keys"):
+        ...
+
+    progress = esoprogress.Progress("Writing item names", total=len(positions))
+    for record in records:
+        ...
+        progress.update(len(rows))
+    progress.close()
+"""
+
+PROGRESS_ENV = "ESOLANG_PROGRESS"
+REDRAW_INTERVAL = 0.25
+
+
+def is_enabled(stream=None):
+    """Returns True if progress lines should be drawn on stream (default: stderr)."""
+    setting = os.environ.get(PROGRESS_ENV, "").strip().lower()
+    if setting in ("0", "off", "false", "no", "none"):
+        return False
+    if setting in ("1", "on", "true", "yes"):
+        return True
+    stream = stream or sys.stderr
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """
+    Throttled status line for a loop of known or unknown length.
+
+    Args:
+        label (str): Text in front of the counts.
+        total (int | None): Number of items expected; without it no percentage or ETA is shown.
+        unit (str): Name of the items counted.
+        stream: File to draw on (default: stderr).
+    """
+
+    def __init__(self, label, total=None, unit="items", stream=None):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.stream = stream or sys.stderr
+        self.enabled = is_enabled(self.stream)
+        self.done = 0
+        self.start = time.perf_counter()
+        self.last_draw = self.start
+        self.next_check = 1
+        self.line_length = 0
+
+    def update(self, amount=1):
+        self.done += amount
+        if self.enabled and self.done >= self.next_check:
+            self.check()
+
+    def check(self):
+        now = time.perf_counter()
+        elapsed = now - self.start
+        if now - self.last_draw >= REDRAW_INTERVAL:
+            self.draw(now)
+        # Look at the clock again after about a tenth of a redraw interval's worth of items
+        rate = self.done / elapsed if elapsed > 0 else 0
+        self.next_check = self.done + max(1, int(rate * REDRAW_INTERVAL / 10))
+
+    def describe(self, now):
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0
+        if self.total:
+            text = f"{self.label}: {self.done}/{self.total} {self.unit} ({100 * self.done / self.total:.0f}%)"
+        else:
+            text = f"{self.label}: {self.done} {self.unit}"
+        text += f", {rate:,.0f}/s"
+        if self.total and rate > 0 and self.done < self.total:
+            text += f", ETA {format_duration((self.total - self.done) / rate)}"
+        else:
+            text += f", {format_duration(elapsed)}"
+        return text
+
+    def draw(self, now):
+        text = self.describe(now)
+        padding = " " * max(0, self.line_length - len(text))
+        self.stream.write(f"\r{text}{padding}")
+        self.stream.flush()
+        self.line_length = len(text)
+        self.last_draw = now
+
+    def close(self):
+        """Draws the final counts and ends the line; nothing is written if the line was never drawn."""
+        if self.enabled and self.line_length:
+            self.draw(time.perf_counter())
+            self.stream.write("\n")
+            self.stream.flush()
+        self.enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def track(iterable, label, total=None, unit="items"):
+    """
+    Yields the items of iterable while drawing a Progress line for them.
+
+    The total is taken from len(iterable) when it is not given. When progress is not drawn the
+    iterable is returned unchanged, so the loop runs at full speed.
+    """
+    if not is_enabled():
+        return iterable
+    if total is None and hasattr(iterable, "__len__"):
+        total = len(iterable)
+    return _track(iterable, Progress(label, total, unit))
+
+
+def _track(iterable, progress):
+    with progress:
+        for item in iterable:
+            yield item
+            progress.update()
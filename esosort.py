@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+from operator import itemgetter
+
+import esoprofile
+
+"""
+Sorting of key/text records within a memory budget, for the commands that write sorted .str,
+tagged or .po files.
+
+sort_records() keeps records in memory until their estimated size reaches the budget, then
+sorts that run and spills it to a temporary file. The runs are merged with heapq.merge while
+the caller iterates over the result, so at most one buffered run plus one small chunk per
+spilled run is in memory. Without spilling it is a plain sorted().
+
+The sort is stable, like sorted(): records with equal keys keep their input order, which is
+what last_per_key() relies on to give dict-like "last value wins" results. join_sorted() pairs
+two sorted streams by key, replacing dict lookups between two files.
+
+The budget is 256 MB unless ESOLANG_SORT_BUDGET_MB is set, e.g. on a small CI runner:
+
+    ESOLANG_SORT_BUDGET_MB=32 python esolang.py combine_client_files en_client.str en_pregame.str
+"""
+
+SORT_BUDGET_ENV = "ESOLANG_SORT_BUDGET_MB"
+DEFAULT_SORT_BUDGET_MB = 256
+# Records pickled together when a run is spilled or read back
+SPILL_CHUNK_SIZE = 1024
+
+first_field = itemgetter(0)
+
+
+def get_sort_budget_bytes(budget_mb=None):
+    """Returns the memory budget in bytes from budget_mb, ESOLANG_SORT_BUDGET_MB or the default."""
+    if budget_mb is None:
+        value = os.environ.get(SORT_BUDGET_ENV)
+        try:
+            budget_mb = float(value) if value else DEFAULT_SORT_BUDGET_MB
+        except ValueError:
+            print(f"Warning: Ignoring {SORT_BUDGET_ENV}={value}, expected a number of MB")
+            budget_mb = DEFAULT_SORT_BUDGET_MB
+    return max(1, int(float(budget_mb) * 1024 * 1024))
+
+
+def estimate_record_size(record):
+    """Returns the approximate bytes a buffered record takes: the tuple, its fields and a list slot."""
+    return sys.getsizeof(record) + sum(sys.getsizeof(field) for field in record) + 8
+
+
+def spill_run(run):
+    """Writes a sorted run to a temporary file and returns the file, positioned at the start."""
+    import pickle
+    import tempfile
+    spill_file = tempfile.TemporaryFile(prefix="esolang_sort_")
+    for start in range(0, len(run), SPILL_CHUNK_SIZE):
+        pickle.dump(run[start:start + SPILL_CHUNK_SIZE], spill_file, pickle.HIGHEST_PROTOCOL)
+    spill_file.seek(0)
+    esoprofile.count("sort runs spilled")
+    esoprofile.count("sort records spilled", len(run))
+    return spill_file
+
+
+def read_run(spill_file):
+    import pickle
+    try:
+        while True:
+            try:
+                chunk = pickle.load(spill_file)
+            except EOFError:
+                return
+            for record in chunk:
+                yield record
+    finally:
+        spill_file.close()
+
+
+def sort_records(records, key=first_field, budget_mb=None):
+    """
+    Returns an iterator over records sorted by key, using about budget_mb of memory for buffering.
+
+    The records are read right away, so input files can be closed before iterating over the
+    result. Records are tuples of str, bytes, numbers or None (anything pickle handles); the
+    default key is the first field.
+
+    Args:
+        records (iterable): Records to sort.
+        key (callable): Sort key, as for sorted().
+        budget_mb (float | None): Memory budget in MB (default: ESOLANG_SORT_BUDGET_MB or 256).
+    """
+    budget = get_sort_budget_bytes(budget_mb)
+    spill_files = []
+    run = []
+    run_size = 0
+    for record in records:
+        run.append(record)
+        run_size += estimate_record_size(record)
+        if run_size >= budget:
+            run.sort(key=key)
+            spill_files.append(spill_run(run))
+            run = []
+            run_size = 0
+
+    run.sort(key=key)
+    if not spill_files:
+        return iter(run)
+
+    import heapq
+    # heapq.merge takes equal keys from earlier runs first, so the merge stays stable
+    return heapq.merge(*[read_run(spill_file) for spill_file in spill_files], iter(run), key=key)
+
+
+def last_per_key(sorted_records, key=first_field):
+    """Yields the last record of each group of equal keys, like building a dict from the records in input order."""
+    previous = None
+    previous_key = None
+    for record in sorted_records:
+        record_key = key(record)
+        if previous is not None and record_key != previous_key:
+            yield previous
+        previous = record
+        previous_key = record_key
+    if previous is not None:
+        yield previous
+
+
+def join_sorted(sorted_records, sorted_other_records, key=first_field):
+    """
+    Yields (record, other record or None) for every record, pairing records with equal keys.
+
+    Both inputs must be sorted by key and hold each key at most once (see last_per_key).
+    """
+    others = iter(sorted_other_records)
+    other = next(others, None)
+    for record in sorted_records:
+        record_key = key(record)
+        while other is not None and key(other) < record_key:
+            other = next(others, None)
+        if other is not None and key(other) == record_key:
+            yield record, other
+        else:
+            yield record, None
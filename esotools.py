@@ -2,14 +2,16 @@
 import argparse
 import sys
 import os
-import inspect
 import re
 import struct
-from slpp import slpp as lua
 from difflib import SequenceMatcher
-import section_constants as section
-import polib
-from icu import Collator, Locale, UCollAttribute, UCollAttributeValue, UnicodeString, BreakIterator
+from array import array
+from bisect import bisect_left
+from collections import namedtuple, deque
+from functools import lru_cache
+import esolua as lua
+import esoprofile
+import esoprogress
 
 """
 From powershell 6.1.7600.16385 you may see question marks rather then the Korean or Chinese text on windows 7.
@@ -35,7 +37,8 @@ def convert_cli_arg(value):
 
 
 def mainFunction(func):
-    """Decorator to mark functions as callable and add them to the list."""
+    """Decorator to mark functions as callable and add them to the list, measured when profiling is on."""
+    func = esoprofile.profiled(func)
     callable_functions.append(func)
     return func
 
@@ -47,6 +50,7 @@ def print_help():
 
 
 def print_docstrings():
+    import inspect
     print("Docstrings for callable functions:")
     for func in callable_functions:
         print("\nFunction: {}".format(func.__name__))
@@ -65,8 +69,15 @@ def main():
     parser.add_argument("--usage", action="store_true", help="Display usage information.")
     parser.add_argument("function", nargs="?", help="The name of the function to execute.")
     parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the function.")
+    parser.add_argument("--profile", action="store_true", help="Record time, memory and I/O of the function in esolang_metrics.jsonl.")
+    parser.add_argument("--profile-memory", action="store_true", help="Like --profile, and also trace Python allocations (slower).")
+    parser.add_argument("--cprofile", action="store_true", help="Like --profile, and also write a cProfile dump of the function.")
+    parser.add_argument("--stats", action="store_true", help="Print the phase timers and counters of the function when it finishes.")
 
     args = parser.parse_args()
+    if args.profile or args.profile_memory or args.cprofile:
+        esoprofile.enable(",".join(option for option, wanted in (
+            ("on", True), ("memory", args.profile_memory), ("cprofile", args.cprofile)) if wanted))
 
     if args.usage:
         print("Usage: esotools.py function [args [args ...]]")
@@ -84,6 +95,8 @@ def main():
             if func.__name__ == function_name:
                 func_args = [convert_cli_arg(arg) for arg in args.args]
                 func(*func_args)
+                if args.stats:
+                    esoprofile.print_stats()
                 break
         else:
             print("Unknown function: {}".format(function_name))
@@ -135,14 +148,17 @@ reColorTag = re.compile(r'\|c[0-9A-Fa-f]{6}|\|r')
 
 
 def get_section_name(section_id):
+    import section_constants as section
     return section.section_info.get(section_id, {}).get("sectionName")
 
 
 def get_num_strings(section_id):
+    import section_constants as section
     return section.section_info.get(section_id, {}).get("numStrings")
 
 
 def get_max_string_length(section_id):
+    import section_constants as section
     return section.section_info.get(section_id, {}).get("maxStringLength")
 
 
@@ -185,25 +201,64 @@ def readExtendedChar(file):
     return char_bytes, shift
 
 
-def readNullStringByChar(offset, start, file):
-    """Reads a null-terminated UTF-8 string one char at a time, preserving raw binary bytes."""
-    currentPosition = file.tell()
-    file.seek(start + offset)
+# Bytes read per call when scanning a binary file for null terminators
+NULL_SCAN_CHUNK_SIZE = 64 * 1024
+# Bytes read per call when looking up one string at an offset; most strings end within it,
+# and readLangFile is about a third slower with NULL_SCAN_CHUNK_SIZE reads per string
+NULL_STRING_CHUNK_SIZE = 1024
+
+
+def read_null_terminated(file, position, chunk_size=NULL_STRING_CHUNK_SIZE):
+    """
+    Reads the bytes from position up to, but not including, the next null terminator or EOF.
 
-    nullChar = False
-    textLine = b''
+    Args:
+        file (file): The binary file object to read from.
+        position (int): Absolute file position where the string starts.
+        chunk_size (int): Bytes read per call while looking for the terminator.
 
-    while not nullChar:
-        char, shift = readExtendedChar(file)
-        if not char:
+    Returns:
+        bytes: The raw string bytes. The file position is left after the last chunk read.
+    """
+    file.seek(position)
+    parts = []
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
             break  # EOF
+        null_index = chunk.find(b'\x00')
+        if null_index >= 0:
+            parts.append(chunk[:null_index])
+            break
+        parts.append(chunk)
+    return b''.join(parts)
+
 
-        if char == b'\x00':
-            nullChar = True
+def iter_null_strings(file, chunk_size=NULL_SCAN_CHUNK_SIZE):
+    """
+    Yields every null-terminated byte string from the current file position to EOF.
+
+    The file is read in large blocks that are split on b'\x00'. Consecutive terminators yield b'',
+    and trailing bytes without a terminator are yielded as a final string.
+    """
+    remainder = b''
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
             break
+        if remainder:
+            chunk = remainder + chunk
+        parts = chunk.split(b'\x00')
+        remainder = parts.pop()
+        yield from parts
+    if remainder:
+        yield remainder
 
-        textLine = b''.join([textLine, char])
 
+def readNullStringByChar(offset, start, file):
+    """Reads a null-terminated UTF-8 string, preserving raw binary bytes."""
+    currentPosition = file.tell()
+    textLine = read_null_terminated(file, start + offset)
     file.seek(currentPosition)
     return textLine
 
@@ -219,24 +274,8 @@ def readNullString(offset, start, file):
     Returns:
         bytes: The read null-terminated string.
     """
-    chunkSize = 1024
-    nullChar = False
-    textLine = b''
     currentPosition = file.tell()
-    file.seek(start + offset)
-    while not nullChar:
-        chunk = file.read(chunkSize)
-        if not chunk:
-            # End of file
-            break
-        null_index = chunk.find(b"\x00")
-        if null_index >= 0:
-            # Found the null terminator within the chunk
-            textLine += chunk[:null_index]
-            nullChar = True
-        else:
-            # Null terminator not found in this chunk, so append the whole chunk to textLine
-            textLine += chunk
+    textLine = read_null_terminated(file, start + offset)
     file.seek(currentPosition)
     return textLine
 
@@ -356,7 +395,49 @@ def writeUInt32(file, value): file.write(struct.pack('>I', value))
 def writeUInt64(file, value): file.write(struct.pack('>Q', value))
 
 
+# Trailer after each itemnames.dat string: 4-byte itemids.dat position, 1-byte item ID count, 4-byte next offset
+ITEMNAMES_TRAILER = struct.Struct(">IBI")
+
+
+def iter_itemnames_records(input_file_path):
+    """
+    Yields every record of an itemnames.dat file as (string_value, position, count, next_offset).
+
+    The file is loaded once and each null terminator is located with bytes.find, so a record costs
+    one slice, one decode and one unpack_from instead of a read call per UTF-8 character.
+
+    Iteration stops at the first empty string or at a truncated trailer, like the previous reader.
+    """
+    with open(input_file_path, "rb") as f:
+        data = f.read()
+
+    view = memoryview(data)
+    find = data.find
+    unpack_trailer = ITEMNAMES_TRAILER.unpack_from
+    trailer_size = ITEMNAMES_TRAILER.size
+    data_length = len(data)
+    offset = 4  # Skip header
+
+    while offset < data_length:
+        end = find(b'\x00', offset)
+        if end < 0:
+            end = data_length
+        if end == offset:
+            break  # Empty string marks the end of the records
+
+        string_value = str(view[offset:end], "utf-8", "replace")
+
+        trailer_start = end + 1
+        if trailer_start + trailer_size > data_length:
+            break
+        position_value, count_value, next_offset = unpack_trailer(data, trailer_start)
+
+        yield string_value, position_value, count_value, next_offset
+        offset = trailer_start + trailer_size
+
+
 def is_valid_language_code(code):
+    from icu import Locale
     try:
         loc = Locale(code)
         return bool(loc.getLanguage())  # returns False if language is invalid
@@ -444,119 +525,190 @@ def generate_output_filename(translated_file, name_text=None, file_extension=Non
         return file_name, base_lang_code
 
 
+# Validated Locale and word BreakIterator per language code, shared by every titlecase call
+titlecase_breakers = {}
+
+
+def get_titlecase_breaker(base_lang_code):
+    """Returns the (Locale, BreakIterator) pair for base_lang_code, validating and creating it only once."""
+    from icu import BreakIterator, Locale
+    breaker = titlecase_breakers.get(base_lang_code)
+    if breaker is None:
+        if not is_valid_language_code(base_lang_code):
+            raise ValueError(f"Language code '{base_lang_code}' is not valid.")
+        locale = Locale(base_lang_code)
+        breaker = (locale, BreakIterator.createWordInstance(locale))
+        titlecase_breakers[base_lang_code] = breaker
+    return breaker
+
+
+@lru_cache(maxsize=None)
 def titlecase(text, base_lang_code):
-    if not is_valid_language_code(base_lang_code):
-        raise ValueError(f"Language code '{base_lang_code}' is not valid.")
-    locale = Locale(base_lang_code)
-    breaker = BreakIterator.createWordInstance(locale)
+    """
+    Titlecases text with ICU word boundaries for base_lang_code.
+
+    Results are memoised because item names repeat heavily, and the BreakIterator is reused;
+    toTitle resets its text on every call.
+    """
+    from icu import UnicodeString
+    locale, breaker = get_titlecase_breaker(base_lang_code)
     return UnicodeString(text).toTitle(breaker, locale).__str__()
 
 
-def parse_itemids_to_dict(input_file_path):
+# Columnar view of itemids.dat, one row per chunk in file order (so positions is already sorted)
+ItemIdColumns = namedtuple("ItemIdColumns", ["positions", "chunk_types", "item_ids", "params", "groups", "indexes"])
+
+# itemids.dat chunk payloads by chunk type: 1 = item ID, 3 = item ID + param, 7 = item ID + group + index
+ITEMIDS_CHUNK_ID = struct.Struct(">I")
+ITEMIDS_CHUNK_PARAM = struct.Struct(">IH")
+ITEMIDS_CHUNK_GROUP = struct.Struct(">IHH")
+
+
+def decode_itemids(input_file_path):
     """
-    Reads en_itemids.dat and returns a dictionary:
-      pos → (value(s), end_pos)
+    Reads en_itemids.dat into parallel arrays instead of a dictionary of tuples.
+
+    Row i of every column describes the chunk starting at positions[i]. Fields a chunk type
+    does not carry are stored as 0; chunk_types tells which fields are meaningful.
+
+    Returns:
+        ItemIdColumns: array.array columns (positions, chunk_types, item_ids, params, groups, indexes).
     """
-    result = {}
+    columns = ItemIdColumns(array('L'), array('B'), array('L'), array('H'), array('H'), array('H'))
 
     with open(input_file_path, "rb") as f:
-        try:
-            header = readUInt32(f)
-        except Exception:
-            print("Unable to read header.")
-            return {}
+        data = f.read()
+
+    if len(data) < 4:
+        print("Unable to read header.")
+        return columns
+
+    add_position = columns.positions.append
+    add_chunk_type = columns.chunk_types.append
+    add_item_id = columns.item_ids.append
+    add_param = columns.params.append
+    add_group = columns.groups.append
+    add_index = columns.indexes.append
+    unpack_id = ITEMIDS_CHUNK_ID.unpack_from
+    unpack_param = ITEMIDS_CHUNK_PARAM.unpack_from
+    unpack_group = ITEMIDS_CHUNK_GROUP.unpack_from
+
+    data_length = len(data)
+    pos = 4  # Skip header
+
+    while pos < data_length:
+        chunk_type = data[pos]
+        param = group = index = 0
+
+        if chunk_type == 1:
+            end = pos + 1 + ITEMIDS_CHUNK_ID.size
+            if end > data_length:
+                break
+            item_id, = unpack_id(data, pos + 1)
 
-        while True:
-            pos = f.tell()
-            try:
-                chunk_type = readUByte(f)
-            except:
-                break  # EOF
-
-            if chunk_type == 1:
-                try:
-                    item_id = readUInt32(f)
-                    result[pos] = ((item_id,), f.tell() - 1)
-                except:
-                    break
-
-            elif chunk_type == 3:
-                try:
-                    item_id = readUInt32(f)
-                    param = readUInt16(f)
-                    result[pos] = ((item_id, param), f.tell() - 1)
-                except:
-                    break
-
-            elif chunk_type == 7:
-                try:
-                    item_id = readUInt32(f)
-                    group = readUInt16(f)
-                    index = readUInt16(f)
-                    result[pos] = ((item_id, group, index), f.tell() - 1)
-                except:
-                    break
+        elif chunk_type == 3:
+            end = pos + 1 + ITEMIDS_CHUNK_PARAM.size
+            if end > data_length:
+                break
+            item_id, param = unpack_param(data, pos + 1)
 
-            else:
-                print("Unknown chunk type {} at offset {}".format(chunk_type, pos))
-                f.read(30)
+        elif chunk_type == 7:
+            end = pos + 1 + ITEMIDS_CHUNK_GROUP.size
+            if end > data_length:
                 break
+            item_id, group, index = unpack_group(data, pos + 1)
 
-    return result
+        else:
+            print("Unknown chunk type {} at offset {}".format(chunk_type, pos))
+            break
 
+        add_position(pos)
+        add_chunk_type(chunk_type)
+        add_item_id(item_id)
+        add_param(param)
+        add_group(group)
+        add_index(index)
+        pos = end
 
-def parse_itemnames_to_dict(input_file_path):
+    return columns
+
+
+def find_itemid_row(columns, position):
+    """Returns the row of the itemids.dat chunk starting at position, or -1 if there is none."""
+    positions = columns.positions
+    row = bisect_left(positions, position)
+    if row < len(positions) and positions[row] == position:
+        return row
+    return -1
+
+
+def expand_itemid_rows(columns, position, count):
     """
-    Parses a language-specific itemnames.dat file into a dictionary.
+    Returns the rows of the count consecutive itemids.dat chunks that start at position.
 
-    Key: position (from en_itemids.dat)
-    Value: (count, next_offset, string_value)
+    An itemnames.dat record points at its first chunk and the rest follow it directly, so one
+    binary search locates the whole run. Returns None if position starts no chunk, and an
+    empty range for a record with a count of 0.
+    """
+    row = find_itemid_row(columns, position)
+    if row < 0:
+        return None
+    return range(row, min(row + count, len(columns.positions)))
+
+
+def parse_itemids_to_dict(input_file_path):
+    """
+    Reads en_itemids.dat and returns a dictionary:
+      pos → (value(s), end_pos)
 
-    If duplicate positions are found, skips them with a warning.
+    Built from decode_itemids; prefer the columns directly for large files.
     """
+    columns = decode_itemids(input_file_path)
     result = {}
-    seen_positions = set()
 
-    with open(input_file_path, "rb") as f:
-        header = readUInt32(f)
+    for row, pos in enumerate(columns.positions):
+        chunk_type = columns.chunk_types[row]
+        item_id = columns.item_ids[row]
 
-        while True:
-            # Read null-terminated UTF-8 string using readExtendedChar
-            string_bytes = bytearray()
-            while True:
-                char, shift = readExtendedChar(f)
-                if not char or char == b'\x00':
-                    break
-                string_bytes.extend(char)
+        if chunk_type == 1:
+            result[pos] = ((item_id,), pos + 4)
+        elif chunk_type == 3:
+            result[pos] = ((item_id, columns.params[row]), pos + 6)
+        else:
+            result[pos] = ((item_id, columns.groups[row], columns.indexes[row]), pos + 8)
 
-            if not string_bytes:
-                break  # EOF
+    return result
 
-            string_value = string_bytes.decode("utf-8", errors="replace")
 
-            # Read 4-byte position in en_itemids.dat
-            position_bytes = f.read(4)
-            if len(position_bytes) < 4:
-                break
-            position_value = struct.unpack(">I", position_bytes)[0]
+def format_examples(values, limit=5):
+    """Returns ' (first: a, b, c)' naming the first few values of a skipped or failed group, for summary warnings."""
+    if not values:
+        return ""
+    shown = ", ".join(str(value) for value in values[:limit])
+    return " (first: {}{})".format(shown, ", ..." if len(values) > limit else "")
 
-            # Read 1-byte count
-            count_bytes = f.read(1)
-            if not count_bytes:
-                break
-            count_value = struct.unpack(">B", count_bytes)[0]
 
-            # Read 4-byte next_offset
-            offset_bytes = f.read(4)
-            if len(offset_bytes) < 4:
-                break
-            next_offset = struct.unpack(">I", offset_bytes)[0]
+def parse_itemnames_to_dict(input_file_path):
+    """
+    Parses a language-specific itemnames.dat file into a dictionary.
 
-            if position_value in result:
-                print("Warning: Duplicate position {}, skipping string: {}".format(position_value, string_value))
-                continue
+    Key: position (from en_itemids.dat)
+    Value: (count, next_offset, string_value)
+
+    If duplicate positions are found, skips them and prints one warning with their count.
+    """
+    result = {}
+    duplicates = []
 
-            result[position_value] = (count_value, next_offset, string_value)
+    for string_value, position_value, count_value, next_offset in iter_itemnames_records(input_file_path):
+        if position_value in result:
+            duplicates.append(position_value)
+            continue
+
+        result[position_value] = (count_value, next_offset, string_value)
+
+    if duplicates:
+        print("Warning: Skipped {} strings with a duplicate position{}".format(len(duplicates), format_examples(duplicates)))
 
     return result
 
@@ -803,21 +955,18 @@ def extract_formatted_itemnames(input_file):
 
     string_count = 0
     with open(input_file, 'rb') as f, open(output_filename, 'w', encoding="utf8") as out:
-        buffer = bytearray()
-        while True:
-            byte = f.read(1)
-            if not byte:
-                if buffer:
-                    out.write(buffer.decode("utf-8", errors="replace") + "\n")
-                    string_count += 1
-                break
-            if byte == b'\x00':
-                if buffer:
-                    out.write(buffer.decode("utf-8", errors="replace") + "\n")
-                    string_count += 1
-                    buffer.clear()
-            else:
-                buffer.extend(byte)
+        batch = []
+        for string_bytes in iter_null_strings(f):
+            if not string_bytes:
+                continue
+            batch.append(string_bytes.decode("utf-8", errors="replace") + "\n")
+            if len(batch) >= 4096:
+                out.write("".join(batch))
+                string_count += len(batch)
+                batch.clear()
+        if batch:
+            out.write("".join(batch))
+            string_count += len(batch)
 
     print("Done. Extracted {} strings to {}.".format(string_count, output_filename))
 
@@ -844,7 +993,7 @@ def rebuild_formatted_itemnames_binary(input_itemnames_dat, input_itemids_dat, i
                 name = match.group(2).strip()
                 itemid_to_formatted_itemnames[item_id] = name
 
-    id_dict = parse_itemids_to_dict(input_itemids_dat)
+    id_columns = decode_itemids(input_itemids_dat)
     names_dict = parse_itemnames_to_dict(input_itemnames_dat)
 
     output_filename, _ = generate_output_filename(item_names_txt, "rebuilt_formatted_itemnames", file_extension="dat")
@@ -854,7 +1003,8 @@ def rebuild_formatted_itemnames_binary(input_itemnames_dat, input_itemids_dat, i
 
         for position in sorted(names_dict.keys()):
             count, next_offset, fallback_name = names_dict[position]
-            item_id = id_dict.get(position, ([0], None))[0][0]
+            row = find_itemid_row(id_columns, position)
+            item_id = id_columns.item_ids[row] if row >= 0 else 0
             string = itemid_to_formatted_itemnames.get(item_id, fallback_name).strip()
             out.write(string.encode("utf-8") + b'\x00')
 
@@ -893,27 +1043,28 @@ def rebuild_formatted_itemnames_binary_with_uppercase(input_itemnames_dat):
 def extract_itemnames_for_rebuild(input_itemnames_file, input_itemids_file):
     """
     Parses en_itemnames.dat and en_itemids.dat:
-    - Handles extended characters using readExtendedChar.
+    - Reads itemnames.dat records using iter_itemnames_records.
     - Reads string, a 4-byte item ID file position pointer, a 1-byte count of associated item IDs,
       and a 4-byte value representing the offset to the next string.
     - Looks up item_id from en_itemids.dat using the position pointer.
     - Outputs: {{position-item_id-count}}string
     """
     item_names_dict = parse_itemnames_to_dict(input_itemnames_file)
-    id_dict = parse_itemids_to_dict(input_itemids_file)
+    id_columns = decode_itemids(input_itemids_file)
 
     output_filename, _ = generate_output_filename(input_itemnames_file, "extracted_itemnames")
+    missing_positions = []
 
     with open(output_filename, "w", encoding="utf8") as out:
-        for position in sorted(item_names_dict.keys()):
+        for position in esoprogress.track(sorted(item_names_dict.keys()), "Writing item names", unit="names"):
             count, _, string_value = item_names_dict[position]
 
-            if position not in id_dict:
-                print("Warning: Position {} not found in itemids file. Skipping.".format(position))
+            row = find_itemid_row(id_columns, position)
+            if row < 0:
+                missing_positions.append(position)
                 continue
 
-            values, _ = id_dict[position]
-            item_id = values[0]
+            item_id = id_columns.item_ids[row]
 
             out.write("{{{{{}-{}-{}}}}}{}\n".format(
                 position,
@@ -922,6 +1073,9 @@ def extract_itemnames_for_rebuild(input_itemnames_file, input_itemids_file):
                 string_value
             ))
 
+    if missing_positions:
+        print("Warning: {} positions not found in itemids file, skipped{}".format(
+            len(missing_positions), format_examples(missing_positions)))
     print("Done. Output written to {}".format(output_filename))
 
 
@@ -936,85 +1090,130 @@ def extract_itemnames_raw_data(input_file, input_itemids_file):
     - Does not deduplicate.
     - Expands each itemnames.dat entry by item_id_count.
     """
-    id_dict = parse_itemids_to_dict(input_itemids_file)
-    sorted_positions = sorted(id_dict.keys())
+    id_columns = decode_itemids(input_itemids_file)
+    positions = id_columns.positions
+    item_ids = id_columns.item_ids
     highest_item_id = 0
     highest_item_name = ""
+    missing_positions = []
 
     output_filename, _ = generate_output_filename(
         input_file,
         "extracted_itemnames_raw"
     )
 
-    with open(input_file, "rb") as textIns:
-        with open(output_filename, "w", encoding="utf8", newline="\n") as out:
-            header = readUInt32(textIns)
-
-            while True:
-                string_bytes = bytearray()
+    # Every itemids row belongs to one name, so the rows written measure the progress
+    progress = esoprogress.Progress("Writing item ids", total=len(positions), unit="ids")
+    with open(output_filename, "w", encoding="utf8", newline="\n") as out, progress:
+        for string_value, position_value, item_id_count, _ in iter_itemnames_records(input_file):
+            rows = expand_itemid_rows(id_columns, position_value, item_id_count)
+            if rows is None:
+                missing_positions.append(position_value)
+                continue
+            progress.update(len(rows))
 
-                while True:
-                    char, shift = readExtendedChar(textIns)
+            for row in rows:
+                item_position = positions[row]
+                item_id = item_ids[row]
 
-                    if not char or char == b'\x00':
-                        break
+                if item_id > highest_item_id:
+                    highest_item_id = item_id
+                    highest_item_name = string_value
 
-                    string_bytes.extend(char)
+                out.write(
+                    f"{{{{{item_position}-{item_id}-{item_id_count}}}}}{string_value}\n"
+                )
 
-                if not string_bytes:
-                    break
+    if missing_positions:
+        print(f"Warning: {len(missing_positions)} positions not found in itemids file, skipped{format_examples(missing_positions)}")
+    print(f"Highest itemId: {highest_item_id}: {highest_item_name}")
+    print(f"Done. Output written to {output_filename}")
 
-                string_value = string_bytes.decode("utf-8", errors="replace")
 
-                try:
-                    position_bytes = textIns.read(4)
+# Suggested name for the sort key cache of rebuild_itemnames_binary; the cache is only used when a path is given
+COLLATION_CACHE_FILE = "esotools_collation_cache.json"
 
-                    if len(position_bytes) < 4:
-                        break
 
-                    position_value = struct.unpack(">I", position_bytes)[0]
+def collation_signature():
+    # Root locale, primary strength, case level off; a cache written with other settings is discarded
+    from icu import ICU_VERSION
+    return (ICU_VERSION, "root", "PRIMARY", "CASE_LEVEL_OFF")
 
-                    count_bytes = textIns.read(1)
 
-                    if not count_bytes:
-                        break
+def create_itemname_collator():
+    from icu import Collator, Locale, UCollAttribute, UCollAttributeValue
+    collator = Collator.createInstance(Locale.getRoot())
+    collator.setStrength(Collator.PRIMARY)
+    collator.setAttribute(UCollAttribute.CASE_LEVEL, UCollAttributeValue.OFF)
+    return collator
 
-                    item_id_count = struct.unpack(">B", count_bytes)[0]
 
-                    textIns.read(4)  # skip offset
+def load_sort_key_cache(cache_path):
+    """
+    Returns the cached {encoded name: sort key} dict, or an empty one if missing, unreadable or stale.
 
-                    if position_value not in id_dict:
-                        print(f"Warning: Position {position_value} not found in itemids file. Skipping.")
-                        continue
+    The cache is JSON with the names and sort keys hex encoded, so reading a cache file found in
+    a working folder never runs code from it.
+    """
+    import json
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("signature") != list(collation_signature()):
+            return {}
+        return {bytes.fromhex(name): bytes.fromhex(sort_key) for name, sort_key in data["sort_keys"].items()}
+    except (OSError, ValueError, AttributeError, KeyError, TypeError) as e:
+        print(f"Warning: Ignoring unreadable collation cache {cache_path}: {e}")
+        return {}
 
-                    start_index = sorted_positions.index(position_value)
-                    item_positions = sorted_positions[start_index:start_index + item_id_count]
 
-                    for item_position in item_positions:
-                        values, _ = id_dict[item_position]
-                        item_id = values[0]
+def save_sort_key_cache(cache_path, sort_keys):
+    import json
+    data = {
+        "signature": list(collation_signature()),
+        "sort_keys": {name.hex(): sort_key.hex() for name, sort_key in sort_keys.items()},
+    }
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_path, cache_path)
 
-                        if item_id > highest_item_id:
-                            highest_item_id = item_id
-                            highest_item_name = string_value
 
-                        out.write(
-                            f"{{{{{item_position}-{item_id}-{item_id_count}}}}}{string_value}\n"
-                        )
+def itemname_sort_keys(encoded_names, cache_path=None):
+    """
+    Returns {encoded name: collation sort key} for every unique name, computing only the
+    keys missing from the cache at cache_path (no cache when None). The cache is rewritten
+    with just these names so it stays the size of one itemnames file.
+    """
+    cached = load_sort_key_cache(cache_path)
+    sort_keys = {}
+    missing = []
+    for encoded_name in encoded_names:
+        sort_key = cached.get(encoded_name)
+        if sort_key is None:
+            missing.append(encoded_name)
+        else:
+            sort_keys[encoded_name] = sort_key
 
-                except Exception as e:
-                    print(f"Error at string '{string_value}': {e}")
-                    break
+    if missing:
+        collator = create_itemname_collator()
+        for encoded_name in missing:
+            sort_keys[encoded_name] = collator.getSortKey(encoded_name.decode("utf-8"))
 
-    print(f"Highest itemId: {highest_item_id}: {highest_item_name}")
-    print(f"Done. Output written to {output_filename}")
+    if cache_path and (missing or len(cached) != len(sort_keys)):
+        save_sort_key_cache(cache_path, sort_keys)
+    return sort_keys
 
 
 @mainFunction
-def rebuild_itemnames_binary(input_txt, sort=False):
+def rebuild_itemnames_binary(input_txt, sort=False, sort_key_cache=None):
     """
     Rebuilds en_itemnames.dat-style binary file from text format:
     Each line: {{position-item_id-count}}name
+    With sort=True entries are ordered by ICU root collation. Pass a sort_key_cache path
+    (e.g. esotools_collation_cache.json) to keep the sort keys between runs.
     Structure per entry:
       - UTF-8 null-terminated string
       - 4-byte position in en_itemids.dat
@@ -1022,22 +1221,24 @@ def rebuild_itemnames_binary(input_txt, sort=False):
       - 4-byte offset to next string (absolute)
     """
     entries = []
+    invalid_lines = []
     output_filename, _ = generate_output_filename(input_txt, "rebuilt_itemnames", file_extension="dat")
 
     with open(input_txt, "r", encoding="utf-8") as infile:
-        for line in infile:
+        for line_number, line in enumerate(infile, start=1):
             match = reItemnameTagged.match(line.strip())
             if match:
                 pos, item_id, count, name = match.groups()
                 entries.append((name.encode("utf-8"), int(pos), int(count)))
             else:
-                print("Skipping invalid line:", line.strip())
+                invalid_lines.append(line_number)
+
+    if invalid_lines:
+        print("Skipped {} invalid lines{}".format(len(invalid_lines), format_examples(invalid_lines)))
 
     if sort is True:
-        collator = Collator.createInstance(Locale.getRoot())
-        collator.setStrength(Collator.PRIMARY)
-        collator.setAttribute(UCollAttribute.CASE_LEVEL, UCollAttributeValue.OFF)
-        entries.sort(key=lambda x: collator.getSortKey(x[0].decode("utf-8")))
+        sort_keys = itemname_sort_keys({encoded_name for encoded_name, _, _ in entries}, sort_key_cache)
+        entries.sort(key=lambda x: sort_keys[x[0]])
 
     with open(output_filename, "wb") as out:
         out.write(struct.pack(">I", 0x00000002))  # Actual header from original file
@@ -1093,14 +1294,17 @@ def merge_translated_itemnames(translated_txt_file, en_itemnames_file, en_itemid
                 itemid_to_translated_strings[int(item_id)] = text.strip()
 
     # Read English itemids
-    id_dict = parse_itemids_to_dict(en_itemids_file)
+    id_columns = decode_itemids(en_itemids_file)
     # Read English itemnames
     names_dict = parse_itemnames_to_dict(en_itemnames_file)
 
     # Build output
     output_lines = []
     for position, data in names_dict.items():
-        item_id = id_dict[position][0][0]
+        row = find_itemid_row(id_columns, position)
+        if row < 0:
+            raise ValueError("Position {} not found in {}.".format(position, en_itemids_file))
+        item_id = id_columns.item_ids[row]
         count = data[0]
         next_offset = data[1]
         string_text = data[2]
@@ -1133,6 +1337,7 @@ def create_po_from_itemnames_dat(translated_txt, english_txt):
         A .po file where msgctxt is the key (e.g. {{4-54476-1}}),
         msgid is the English text, and msgstr is the translated text.
     """
+    import polib
     po = polib.POFile()
 
     output_po, _ = generate_output_filename(translated_txt, "merged_itemnames", file_extension="po")
@@ -1228,7 +1433,7 @@ def lua_array_to_lines(lua_text):
     """Parse a Lua table like {[1]="a", [2]="b", ...} into 'a\\nb\\n...'."""
     tbl = lua.decode(lua_text)
 
-    # slpp may return a dict (numeric keys) or a list; handle both.
+    # Like slpp, esolua returns a dict (numeric keys) or a list; handle both.
     if isinstance(tbl, dict):
         values = [tbl[i] for i in sorted(tbl.keys())]
     else:
@@ -1246,101 +1451,160 @@ def convert_lua_map_names_to_text(in_path):
         f.write(lines + "\n")
 
 
-@mainFunction
-def build_lqd_mapindex_files(input_file, output_folder="mapIndex_files"):
-    """
-    Reads LibQuestHelper.lua and extracts
-    LibQuestHelper_SavedVariables["location_data_by_mapIndex"].
-
-    Generates one Lua file per mapIndex in the output folder.
+def format_lqd_mapindex_file(map_index_name, map_data):
+    """Returns the text of mapIndex_files/<map_index_name>.lua for one location_data_by_mapIndex entry."""
+    output_lines = []
 
-    Args:
-        input_file (str):
-            Path to LibQuestHelper.lua.
+    output_lines.append('local lib = _G["LibQuestData"]')
+    output_lines.append("")
+    output_lines.append(f"function lib:{map_index_name}_Quests()")
+    output_lines.append("  self.currentQuestMapIndexQuests = {")
 
-        output_folder (str):
-            Folder where generated mapIndex files are written.
-    """
+    for map_id in sorted(map_data.keys()):
 
-    print("Opening file:", input_file)
-    print("Output folder:", output_folder)
+        quest_table = map_data[map_id]
 
-    os.makedirs(output_folder, exist_ok=True)
+        output_lines.append(f"    [{map_id}] = ")
+        output_lines.append("    {")
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        raw = f.read()
+        for index in sorted(quest_table.keys()):
+            quest_string = quest_table[index]
+            output_lines.append(f'      [{index}] = "{quest_string}",')
 
-    print("Input file size:", len(raw))
+        output_lines.append("    },")
 
-    raw = re.sub(
-        r'^\s*LibQuestHelper_SavedVariables\s*=\s*',
-        '',
-        raw,
-        count=1
-    )
+    output_lines.append("  }")
+    output_lines.append("end")
+    output_lines.append("")
 
-    print("Decoding Lua table...")
+    return "\n".join(output_lines)
 
-    table_data = lua.decode(raw)
 
-    if not table_data:
-        raise ValueError("Lua decode returned empty data.")
+# Decoded maps waiting for a worker in build_lqd_mapindex_files; bounds the memory held by the stream
+MAX_PENDING_MAPS = 64
 
-    print("Top level keys found:", list(table_data.keys())[:10])
 
-    if "location_data_by_mapIndex" not in table_data:
-        raise ValueError('Could not find "location_data_by_mapIndex" in Lua file.')
+def write_text_if_changed(output_filename, text):
+    """Writes text as UTF-8 unless the file already holds exactly those bytes. Returns True if written."""
+    data = text.encode("utf-8")
+    try:
+        if os.path.getsize(output_filename) == len(data):
+            with open(output_filename, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
 
-    table_data = table_data["location_data_by_mapIndex"]
+    with open(output_filename, "wb") as f:
+        f.write(data)
+    return True
 
-    print("Map index count:", len(table_data))
 
-    generated_count = 0
+def emit_lqd_mapindex_file(output_folder, map_index_name, map_data):
+    """Worker for build_lqd_mapindex_files: returns (output filename, True if the file was rewritten)."""
+    output_filename = os.path.join(output_folder, f"{map_index_name}.lua")
+    output_text = format_lqd_mapindex_file(map_index_name, map_data)
+    return output_filename, write_text_if_changed(output_filename, output_text)
 
-    for map_index_name in sorted(table_data.keys()):
 
-        print("Processing:", map_index_name)
+@mainFunction
+def build_lqd_mapindex_files(input_file, output_folder="mapIndex_files", verbose=False, workers=None):
+    """
+    Reads LibQuestHelper.lua and extracts
+    LibQuestHelper_SavedVariables["location_data_by_mapIndex"].
 
-        map_data = table_data[map_index_name]
+    Generates one Lua file per mapIndex in the output folder. The SavedVariables table is
+    streamed: each mapIndex is decoded as soon as its table is read and handed to a worker
+    thread that formats it and writes it only if the content changed. The other top level
+    tables are skipped without being decoded. A mapIndex that appears twice is written once,
+    with its last table, as Lua would load it.
 
-        output_lines = []
+    Args:
+        input_file (str):
+            Path to LibQuestHelper.lua.
 
-        output_lines.append('local lib = _G["LibQuestData"]')
-        output_lines.append("")
-        output_lines.append(f"function lib:{map_index_name}_Quests()")
-        output_lines.append("  self.currentQuestMapIndexQuests = {")
+        output_folder (str):
+            Folder where generated mapIndex files are written.
 
-        for map_id in sorted(map_data.keys()):
+        verbose (bool):
+            Print every mapIndex, MapId and file written instead of a progress line.
 
-            print("  MapId:", map_id)
+        workers (int | None):
+            Number of threads formatting and writing files (default: ThreadPoolExecutor's default).
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
-            quest_table = map_data[map_id]
+    print("Opening file:", input_file)
+    print("Output folder:", output_folder)
 
-            output_lines.append(f"    [{map_id}] = ")
-            output_lines.append("    {")
+    os.makedirs(output_folder, exist_ok=True)
 
-            for index in sorted(quest_table.keys()):
-                quest_string = quest_table[index]
-                output_lines.append(f'      [{index}] = "{quest_string}",')
+    with open(input_file, "r", encoding="utf-8") as f:
+        raw = f.read()
 
-            output_lines.append("    },")
+    print("Input file size:", len(raw))
 
-        output_lines.append("  }")
-        output_lines.append("end")
-        output_lines.append("")
+    # Skip the assignment instead of copying the whole text with re.sub
+    assignment = re.match(r'\s*LibQuestHelper_SavedVariables\s*=\s*', raw)
+    table_start = assignment.end() if assignment else 0
 
-        output_text = "\n".join(output_lines)
+    if not raw[table_start:].strip():
+        raise ValueError("Lua decode returned empty data.")
 
-        output_filename = os.path.join(output_folder, f"{map_index_name}.lua")
+    print("Streaming location_data_by_mapIndex...")
 
-        print("Writing:", output_filename)
+    map_entries = lua.iter_table_entries(raw, ["location_data_by_mapIndex"], table_start)
+    max_workers = None if workers is None else max(1, int(workers))
 
-        with open(output_filename, "w", encoding="utf-8", newline="\n") as f:
-            f.write(output_text)
+    duplicate_names = []
+    progress = esoprogress.Progress("Generating mapIndex files", unit="files")
+    if verbose:
+        progress.enabled = False
 
-        generated_count += 1
+    def collect(future):
+        output_filename, written = future.result()
+        if verbose:
+            print("Writing:" if written else "Unchanged:", output_filename)
+        progress.update()
 
-    print("Generated {} mapIndex files.".format(generated_count))
+    # Only a few decoded maps wait for a worker at any time, so memory stays at a handful of maps
+    pending = deque()
+    # Latest write per mapIndex; a repeated name waits for the earlier write so two threads never write one file
+    submitted = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            try:
+                map_index_name, map_data = next(map_entries)
+            except StopIteration:
+                break
+            except KeyError:
+                raise ValueError('Could not find "location_data_by_mapIndex" in Lua file.')
+
+            if verbose:
+                print("Processing:", map_index_name)
+                for map_id in sorted(map_data.keys()):
+                    print("  MapId:", map_id)
+
+            previous = submitted.get(map_index_name)
+            if previous is not None:
+                duplicate_names.append(map_index_name)
+                previous.result()
+
+            future = executor.submit(emit_lqd_mapindex_file, output_folder, map_index_name, map_data)
+            submitted[map_index_name] = future
+            pending.append(future)
+            while len(pending) > MAX_PENDING_MAPS:
+                collect(pending.popleft())
+
+        while pending:
+            collect(pending.popleft())
+
+    progress.close()
+    if duplicate_names:
+        print("Warning: {} mapIndex tables repeat an earlier name, the last one was written{}".format(
+            len(duplicate_names), format_examples(duplicate_names)))
+    unchanged_count = sum(1 for future in submitted.values() if not future.result()[1])
+    print("Generated {} mapIndex files ({} unchanged).".format(len(submitted), unchanged_count))
 
 
 if __name__ == "__main__":
@@ -2,8 +2,8 @@
 import argparse
 import sys
 import os
-import inspect
-import icu
+from functools import lru_cache
+import esoprofile
 
 # List to hold information about callable functions
 callable_functions = []
@@ -22,7 +22,8 @@ def convert_cli_arg(value):
 
 
 def mainFunction(func):
-    """Decorator to mark functions as callable and add them to the list."""
+    """Decorator to mark functions as callable and add them to the list, measured when profiling is on."""
+    func = esoprofile.profiled(func)
     callable_functions.append(func)
     return func
 
@@ -34,6 +35,7 @@ def print_help():
 
 
 def print_docstrings():
+    import inspect
     print("Docstrings for callable functions:")
     for func in callable_functions:
         print("\nFunction: {}".format(func.__name__))
@@ -52,8 +54,15 @@ def main():
     parser.add_argument("--usage", action="store_true", help="Display usage information.")
     parser.add_argument("function", nargs="?", help="The name of the function to execute.")
     parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the function.")
+    parser.add_argument("--profile", action="store_true", help="Record time, memory and I/O of the function in esolang_metrics.jsonl.")
+    parser.add_argument("--profile-memory", action="store_true", help="Like --profile, and also trace Python allocations (slower).")
+    parser.add_argument("--cprofile", action="store_true", help="Like --profile, and also write a cProfile dump of the function.")
+    parser.add_argument("--stats", action="store_true", help="Print the phase timers and counters of the function when it finishes.")
 
     args = parser.parse_args()
+    if args.profile or args.profile_memory or args.cprofile:
+        esoprofile.enable(",".join(option for option, wanted in (
+            ("on", True), ("memory", args.profile_memory), ("cprofile", args.cprofile)) if wanted))
 
     if args.usage:
         print("Usage: esoutils.py function [args [args ...]]")
@@ -71,6 +80,8 @@ def main():
             if func.__name__ == function_name:
                 func_args = [convert_cli_arg(arg) for arg in args.args]
                 func(*func_args)
+                if args.stats:
+                    esoprofile.print_stats()
                 break
         else:
             print("Unknown function: {}".format(function_name))
@@ -78,6 +89,29 @@ def main():
         print("No command provided.")
 
 
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+@lru_cache(maxsize=None)
+def get_nfc_normalizer():
+    """The ICU NFC instance, looked up once. Normalizer2 instances are immutable and thread safe."""
+    import icu
+    return icu.Normalizer2.getNFCInstance()
+
+
+def normalize_nfc(text):
+    """
+    NFC-normalise text. ASCII text is always NFC and never reaches ICU, and text that
+    is already normalised is returned unchanged without building a copy.
+    """
+    if text.isascii():
+        return text
+    normalizer = get_nfc_normalizer()
+    if normalizer.isNormalized(text):
+        return text
+    return normalizer.normalize(text)
+
+
 def detect_and_fix_utf8_bom(file_path):
     """
     Check if a file has a UTF-8 BOM and remove it if present.
@@ -92,9 +126,7 @@ def detect_and_fix_utf8_bom(file_path):
         # Check for BOM
         if content_bytes.startswith(b'\xef\xbb\xbf'):
             # Decode, normalize, and rewrite
-            text = content_bytes.decode('utf-8-sig')
-            normalizer = icu.Normalizer2.getNFCInstance()
-            text = normalizer.normalize(text)
+            text = normalize_nfc(content_bytes.decode('utf-8-sig'))
 
             with open(file_path, 'w', encoding='utf-8', newline='\n') as f:
                 f.write(text)
@@ -108,15 +140,54 @@ def detect_and_fix_utf8_bom(file_path):
         print(f"Error processing {file_path}: {e}")
 
 
+def apply_license_header(file_path, license_header):
+    """
+    Read file_path once, drop a UTF-8 BOM, add license_header if it is missing and write
+    the file at most once. Gives the same result as detect_and_fix_utf8_bom followed by the
+    header check in add_license_header.
+
+    Returns (header_added, bom_fixed, error message or None).
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            content_bytes = f.read()
+
+        bom_fixed = content_bytes.startswith(UTF8_BOM)
+        if bom_fixed:
+            text = normalize_nfc(content_bytes[len(UTF8_BOM):].decode('utf-8'))
+        else:
+            text = content_bytes.decode('utf-8')
+
+        # Universal newlines, as when the file is read in text mode
+        content = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        header_added = license_header.strip() not in content
+        if header_added:
+            text = normalize_nfc(license_header + content)
+
+        if header_added or bom_fixed:
+            with open(file_path, 'w', encoding='utf-8', newline='\n') as lua_file:
+                lua_file.write(text)
+
+        return header_added, bom_fixed, None
+
+    except Exception as e:
+        return False, False, str(e)
+
+
 @mainFunction
-def add_license_header(root_path, header_file):
+def add_license_header(root_path, header_file, workers=None):
     """
     Add a specified license header to all .lua files in a directory (recursively).
+    A UTF-8 BOM is removed from every file visited. Each file is read once and written at
+    most once, and files are processed on a thread pool.
 
     Args:
         root_path (str): The root folder to walk through and update .lua files.
         header_file (str): Path to a text file containing the license header.
+        workers (int | None): Number of worker threads (default: ThreadPoolExecutor's default).
     """
+    from concurrent.futures import ThreadPoolExecutor
     if not os.path.isdir(root_path):
         print(f"Error: {root_path} is not a valid directory.")
         return
@@ -129,35 +200,96 @@ def add_license_header(root_path, header_file):
     with open(header_file, 'r', encoding='utf-8') as f:
         license_header = f.read().strip() + "\n\n"
 
-    updated_files = []
-
+    lua_files = []
     for dirpath, _, filenames in os.walk(root_path):
         for filename in filenames:
             if filename.endswith(".lua"):
-                file_path = os.path.join(dirpath, filename)
+                lua_files.append(os.path.join(dirpath, filename))
+
+    updated_count = 0
+    bom_count = 0
+    error_count = 0
+
+    with ThreadPoolExecutor(max_workers=None if workers is None else max(1, int(workers))) as executor:
+        results = executor.map(lambda path: apply_license_header(path, license_header), lua_files)
+        for file_path, (header_added, bom_fixed, error) in zip(lua_files, results):
+            if error:
+                print(f"Error processing {file_path}: {error}")
+                error_count += 1
+                continue
+            if bom_fixed:
+                print(f"Fixing BOM in {file_path}")
+                bom_count += 1
+            if header_added:
+                updated_count += 1
+
+    if updated_count:
+        print(f"Updated {updated_count} files with license header.")
+    else:
+        print("No files were updated (header may already be present).")
+    print(f"Summary: {len(lua_files)} .lua files, {updated_count} headers added, {bom_count} BOMs removed, {error_count} errors.")
 
-                # Fix BOM before reading
-                detect_and_fix_utf8_bom(file_path)
 
-                # Read the current content
-                with open(file_path, 'r', encoding='utf-8') as lua_file:
-                    content = lua_file.read()
+def normalize_file_nfc(file_path):
+    """
+    NFC-normalise one UTF-8 file in place, keeping its BOM and line endings.
+    Returns (changed, error message or None).
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            content_bytes = f.read()
+        if content_bytes.isascii():
+            return False, None
 
-                # Add header only if not already present
-                if license_header.strip() not in content:
-                    normalizer = icu.Normalizer2.getNFCInstance()
-                    updated_content = license_header + content
-                    updated_content = normalizer.normalize(updated_content)
+        text = content_bytes.decode('utf-8')
+        normalized = normalize_nfc(text)
+        if normalized is text:
+            return False, None
 
-                    with open(file_path, 'w', encoding='utf-8', newline='\n') as lua_file:
-                        lua_file.write(updated_content)
+        with open(file_path, 'wb') as f:
+            f.write(normalized.encode('utf-8'))
+        return True, None
 
-                    updated_files.append(file_path)
+    except Exception as e:
+        return False, str(e)
 
-    if updated_files:
-        print(f"Updated {len(updated_files)} files with license header.")
-    else:
-        print("No files were updated (header may already be present).")
+
+@mainFunction
+def normalize_tree(root_path, extensions=".lua,.txt,.xml", workers=None):
+    """
+    NFC-normalise every file with one of the given extensions below root_path and report
+    how many files actually needed changes. Files that are ASCII or already NFC are not written.
+
+    Args:
+        root_path (str): The root folder to walk through.
+        extensions (str): Comma separated file extensions to include (default: .lua,.txt,.xml).
+        workers (int | None): Number of worker threads (default: ThreadPoolExecutor's default).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if not os.path.isdir(root_path):
+        print(f"Error: {root_path} is not a valid directory.")
+        return
+
+    wanted = tuple(ext.strip().lower() for ext in extensions.split(",") if ext.strip())
+    candidates = []
+    for dirpath, _, filenames in os.walk(root_path):
+        for filename in filenames:
+            if filename.lower().endswith(wanted):
+                candidates.append(os.path.join(dirpath, filename))
+
+    changed_count = 0
+    error_count = 0
+
+    with ThreadPoolExecutor(max_workers=None if workers is None else max(1, int(workers))) as executor:
+        for file_path, (changed, error) in zip(candidates, executor.map(normalize_file_nfc, candidates)):
+            if error:
+                print(f"Error processing {file_path}: {error}")
+                error_count += 1
+            elif changed:
+                print(f"Normalized {file_path}")
+                changed_count += 1
+
+    print(f"Summary: {len(candidates)} files checked, {changed_count} normalized, {error_count} errors.")
 
 
 @mainFunction